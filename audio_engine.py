@@ -0,0 +1,154 @@
+# audio_engine.py
+import time
+from collections import deque
+
+import numpy as np
+
+from wav_io import SAMPLE_RATE, CHANNELS, write_wav
+from sample_cache import default_cache
+
+BLOCK_SIZE = 256
+# How far a late callback timestamp moves the time/frame anchor
+ANCHOR_SMOOTHING = 0.05
+
+
+class AudioEngine:
+    """Mixes decoded one-shot samples into a single output stream.
+
+    Samples are decoded once through the shared sample cache (`load`, off the
+    audio path). Hits are queued with `trigger` from any thread without
+    locks or disk access and mixed block by block in `render`,
+    either from a sound card callback (`start`) or offline (`render`,
+    `render_to_wav`) without any audio device.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, channels=CHANNELS,
+                 block_size=BLOCK_SIZE, max_voices=64, cache=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.max_voices = max_voices
+        self.cache = cache if cache is not None else default_cache
+        self.voices = []  # [buffer, read position, start frame, gain]
+        self.frame = 0  # frames rendered so far
+        self.stream = None
+        self._pending = deque()
+        # Wall clock anchor for mapping scheduler deadlines onto frames
+        self._anchor = (time.perf_counter(), 0)
+        self._synced = False
+
+    def load(self, path):
+        """Return the decoded sample, decoding it only if it is not cached."""
+        return self.cache.get(path, self.sample_rate, self.channels)
+
+    def trigger(self, sample, frame=None, gain=1.0):
+        """Queue a hit at absolute engine frame `frame` (None = as soon as possible).
+
+        `sample` is a buffer from `load`, or a path that was loaded before;
+        a path that is not in the cache is ignored rather than decoded here.
+        """
+        if isinstance(sample, str):
+            sample = self.cache.peek(sample, self.sample_rate, self.channels)
+            if sample is None:
+                return
+        self._pending.append((sample, frame, gain))
+
+    def frame_for_time(self, t):
+        """Map a time.perf_counter() timestamp onto an engine frame."""
+        anchor_time, anchor_frame = self._anchor
+        # One block of headroom so a hit scheduled "now" is never in the past
+        return anchor_frame + self.block_size + int(round((t - anchor_time) * self.sample_rate))
+
+    def render(self, frames):
+        """Mix the next `frames` frames and return them as a float32 array."""
+        out = np.zeros((frames, self.channels), dtype=np.float32)
+        block_start = self.frame
+        block_end = block_start + frames
+
+        while self._pending:
+            buf, at, gain = self._pending.popleft()
+            start = block_start if at is None or at < block_start else at
+            self.voices.append([buf, 0, start, gain])
+        if len(self.voices) > self.max_voices:
+            # Voice stealing: drop the oldest hits first
+            self.voices = self.voices[-self.max_voices:]
+
+        alive = []
+        for voice in self.voices:
+            buf, pos, start, gain = voice
+            if start >= block_end:
+                alive.append(voice)
+                continue
+            offset = max(start - block_start, 0)
+            n = min(frames - offset, len(buf) - pos)
+            if n > 0:
+                if gain == 1.0:
+                    out[offset:offset + n] += buf[pos:pos + n]
+                else:
+                    out[offset:offset + n] += buf[pos:pos + n] * gain
+                voice[1] = pos + n
+                voice[2] = block_end
+            if voice[1] < len(buf):
+                alive.append(voice)
+        self.voices = alive
+
+        self.frame = block_end
+        return out
+
+    def render_to_wav(self, target, frames):
+        """Render `frames` frames offline and write them to a WAV path or file object."""
+        blocks = []
+        remaining = frames
+        while remaining > 0:
+            n = min(self.block_size, remaining)
+            blocks.append(self.render(n))
+            remaining -= n
+        buffer = np.concatenate(blocks) if blocks else np.zeros((0, self.channels), np.float32)
+        write_wav(target, buffer, self.sample_rate)
+        return buffer
+
+    def _sync(self, t, frame):
+        """Move the time/frame anchor towards a callback that saw `frame` at time `t`.
+
+        A late wake-up only makes `t` later than the frame count predicts,
+        so an early reading is taken as is and a late one only nudges the
+        anchor; scheduled hits then stay put under callback jitter.
+        """
+        anchor_time, anchor_frame = self._anchor
+        expected = anchor_time + (frame - anchor_frame) / self.sample_rate
+        if self._synced and t > expected:
+            t = expected + (t - expected) * ANCHOR_SMOOTHING
+        self._anchor = (t, frame)
+        self._synced = True
+
+    def _callback(self, outdata, frames, time_info, status):
+        now = time.perf_counter()
+        dac_time = time_info.outputBufferDacTime
+        if dac_time:
+            # When this block reaches the DAC, moved onto the perf_counter clock
+            now += dac_time - time_info.currentTime
+        self._sync(now, self.frame)
+        outdata[:] = self.render(frames)
+
+    def start(self):
+        """Open the default sound card output stream (requires sounddevice)."""
+        if self.stream is not None:
+            return
+        import sounddevice
+
+        self._synced = False
+        self.stream = sounddevice.OutputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            blocksize=self.block_size,
+            dtype="float32",
+            latency="low",
+            callback=self._callback,
+        )
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
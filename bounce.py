@@ -0,0 +1,107 @@
+# bounce.py
+import os
+
+import numpy as np
+
+from wav_io import SAMPLE_RATE, CHANNELS, write_wav
+from playback import SOUND_MAP
+from sequencer import DEFAULT_VELOCITY
+from sample_cache import default_cache
+
+
+class Bouncer:
+    """Offline pattern-to-audio renderer.
+
+    Samples come from the shared sample cache, so rendering many grooves
+    with the same kit only pays the decode cost a single time. Hit
+    positions are computed as arrays per note; each hit is then
+    accumulated with a contiguous slice add, which measured two orders of
+    magnitude faster than np.add.at over the expanded sample windows.
+    Hits are placed with the pattern's groove (offsets and swing) and
+    scaled by velocity relative to DEFAULT_VELOCITY.
+    """
+
+    def __init__(self, samples=None, sample_rate=SAMPLE_RATE, channels=CHANNELS, cache=None):
+        self.samples = dict(SOUND_MAP if samples is None else samples)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.cache = cache if cache is not None else default_cache
+        self.buffers = {}
+
+    def _buffer(self, note):
+        if note not in self.buffers:
+            path = self.samples.get(note)
+            self.buffers[note] = (
+                self.cache.get(path, self.sample_rate, self.channels)
+                if path and os.path.exists(path) else None
+            )
+        return self.buffers[note]
+
+    def render(self, patterns, bpm, tail=True):
+        """Render one pattern or a list of patterns back to back.
+
+        Returns a float32 (frames, channels) array. With `tail` the buffer
+        is extended so the last hits ring out instead of being cut at the
+        end of the final step.
+        """
+        if hasattr(patterns, "get_events"):
+            patterns = [patterns]
+
+        step_frames = 60.0 / bpm / 4.0 * self.sample_rate
+        parts = []
+        offset = 0
+        for pat in patterns:
+            notes, steps, velocities, delays = pat.hits()
+            parts.append((notes, offset + steps + delays, velocities))
+            offset += pat.steps
+        if parts:
+            notes, positions, velocities = (np.concatenate(a) for a in zip(*parts))
+        else:
+            notes = positions = velocities = np.zeros(0)
+        frames = np.maximum(np.round(positions * step_frames), 0).astype(np.int64)
+        gains = velocities / DEFAULT_VELOCITY
+
+        length = int(round(offset * step_frames))
+        starts = {}
+        for note in np.unique(notes).tolist():
+            buf = self._buffer(note)
+            if buf is None or not len(buf):
+                continue
+            mask = notes == note
+            starts[note] = (frames[mask], gains[mask])
+            if tail:
+                length = max(length, int(frames[mask].max()) + len(buf))
+
+        out = np.zeros((length, self.channels), dtype=np.float32)
+        for note, (note_frames, note_gains) in starts.items():
+            buf = self.buffers[note]
+            for start, gain in zip(note_frames.tolist(), note_gains.tolist()):
+                n = min(len(buf), length - start)
+                if n <= 0:
+                    continue
+                if gain == 1.0:
+                    out[start:start + n] += buf[:n]
+                else:
+                    out[start:start + n] += buf[:n] * gain
+        return out
+
+    def bounce(self, patterns, bpm, filename, tail=True):
+        """Render patterns and write them to a 16-bit WAV file."""
+        buffer = self.render(patterns, bpm, tail=tail)
+        write_wav(filename, buffer, self.sample_rate)
+        return buffer
+
+    def bounce_many(self, patterns, bpm, directory, name="groove_{:05d}.wav"):
+        """Write every pattern in an iterable to its own WAV file; returns the paths."""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for i, pat in enumerate(patterns):
+            path = os.path.join(directory, name.format(i))
+            self.bounce(pat, bpm, path)
+            paths.append(path)
+        return paths
+
+
+def bounce_pattern(patterns, bpm, filename, samples=None):
+    """Render a pattern (or list of patterns) at `bpm` to a WAV file."""
+    return Bouncer(samples).bounce(patterns, bpm, filename)
@@ -0,0 +1,236 @@
+# cli.py
+"""Headless command-line entry point for batch jobs.
+
+Usage:
+    python cli.py generate -n 1000 -o grooves.db
+    python cli.py export grooves.db -o grooves.mid --bpm 100
+    python cli.py import LIBRARY_DIR -o presets.db
+    python cli.py render grooves.db --each wav_out/
+    python cli.py presets list --tag funk
+
+Patterns are read from a preset store (.db), a presets .json file or a
+MIDI file, and streamed through each job. Nothing here imports flet or
+tkinter, so it runs on machines without a display.
+"""
+import argparse
+import os
+import sys
+
+DEFAULT_BPM = 120
+MIDI_EXTENSIONS = (".mid", ".midi")
+
+
+def _kit(args):
+    from kit import get_kit
+
+    try:
+        return get_kit(args.kit) if args.kit else None
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+
+
+def _require(path):
+    # Opening a missing store would create an empty one and "succeed"
+    if not os.path.exists(path):
+        sys.exit(f"error: {path}: no such file")
+
+
+def _filters(args):
+    return {"steps": args.steps, "tag": args.tag}
+
+
+def read_patterns(source, steps=None, tag=None):
+    """Yield the patterns stored in a preset store, presets .json or MIDI file."""
+    if source.lower().endswith(MIDI_EXTENSIONS):
+        from midi_import import load_pattern
+
+        pattern, _ = load_pattern(source)
+        if steps is None or pattern.steps == steps:
+            yield pattern
+    elif source.endswith(".json"):
+        from presets import load_presets
+
+        for pattern in load_presets(source):
+            if steps is None or pattern.steps == steps:
+                yield pattern
+    else:
+        from preset_store import PresetStore
+
+        with PresetStore(source) as store:
+            yield from store.patterns(steps=steps, tag=tag)
+
+
+def write_patterns(patterns, output, bpm=DEFAULT_BPM, tags=(), out=sys.stdout):
+    """Stream patterns to a preset store, presets .json, MIDI file or (None) text on `out`."""
+    count = 0
+    if output is None:
+        for pattern in patterns:
+            out.write("\n".join(pattern.to_text()) + "\n\n")
+            count += 1
+    elif output.lower().endswith(MIDI_EXTENSIONS):
+        from midi_export import MidiStreamWriter
+
+        with MidiStreamWriter(output, bpm) as writer:
+            for pattern in patterns:
+                writer.write_pattern(pattern)
+                count += 1
+    elif output.endswith(".json"):
+        from presets import PresetWriter
+
+        with PresetWriter(output) as writer:
+            for pattern in patterns:
+                writer.add(pattern)
+                count += 1
+    else:
+        from preset_store import PresetStore
+
+        with PresetStore(output) as store:
+            ids = store.add_many((pattern, {"bpm": bpm, "tags": tags}) for pattern in patterns)
+            count = len(ids)
+    return count
+
+
+def _swung(patterns, swing):
+    for pattern in patterns:
+        pattern.swing = swing
+        yield pattern
+
+
+def cmd_generate(args):
+    from kit import DEFAULT_KIT
+    from sequencer import Pattern, generate_batch, iter_patterns
+
+    kit = _kit(args) or DEFAULT_KIT
+    if args.kind == "euclidean":
+        pattern = Pattern(args.steps, kit)
+        for row, pulses in enumerate(args.pulses):
+            pattern.generate_euclidean(pulses, args.steps, row, args.rotation)
+        patterns = [pattern]
+    else:
+        probs = kit.fill_probs if args.kind == "fill" else kit.random_probs
+        patterns = iter_patterns(generate_batch(args.count, probs, args.steps, seed=args.seed), kit)
+    if args.swing:
+        patterns = _swung(patterns, args.swing)
+    count = write_patterns(patterns, args.output, args.bpm, args.tag)
+    print(f"Generated {count} patterns", file=sys.stderr)
+
+
+def cmd_export(args):
+    from midi_export import export_stream
+
+    _require(args.source)
+    export_stream(read_patterns(args.source, **_filters(args)), args.bpm, args.output,
+                  split_rows=args.split_rows)
+
+
+def cmd_import(args):
+    from ingest import ingest
+
+    _, errors = ingest(args.sources, args.output, args.jobs, args.dedupe, kit=_kit(args))
+    return 1 if errors else 0
+
+
+def cmd_render(args):
+    from bounce import Bouncer
+
+    _require(args.source)
+    bouncer = Bouncer()
+    patterns = read_patterns(args.source, **_filters(args))
+    if args.each:
+        paths = bouncer.bounce_many(patterns, args.bpm, args.each)
+        print(f"Rendered {len(paths)} files", file=sys.stderr)
+    else:
+        bouncer.bounce(list(patterns), args.bpm, args.output)
+
+
+def cmd_presets(args):
+    from preset_store import PresetStore
+
+    _require(args.store)
+    with PresetStore(args.store) as store:
+        if args.action == "list":
+            for preset_id in store.ids(steps=args.steps, tag=args.tag):
+                info = store.info(preset_id)
+                print(f"{info['id']}\t{info['steps']}\t{info['bpm'] or ''}\t"
+                      f"{','.join(info['tags'])}\t{info['name'] or ''}")
+        elif args.action == "show":
+            for preset_id in args.ids:
+                print(f"# {preset_id}")
+                print("\n".join(store.get(preset_id).to_text()))
+        elif args.action == "delete":
+            for preset_id in args.ids:
+                store.delete(preset_id)
+        elif args.action == "nearest":
+            for preset_id in args.ids:
+                for other, distance in store.nearest(store.get(preset_id), args.k + 1):
+                    if other != preset_id:
+                        print(f"{preset_id}\t{other}\t{distance}")
+
+
+def _add_filters(parser):
+    parser.add_argument("--steps", type=int, help="only patterns with this many steps")
+    parser.add_argument("--tag", help="only presets with this tag (preset stores only)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless drum pattern batch jobs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="generate patterns")
+    p.add_argument("-n", "--count", type=int, default=1, help="number of patterns (random/fill)")
+    p.add_argument("--kind", choices=["random", "fill", "euclidean"], default="random")
+    p.add_argument("--steps", type=int, default=16)
+    p.add_argument("--seed", type=int, help="seed for reproducible batches")
+    p.add_argument("--pulses", type=lambda s: [int(x) for x in s.split(",")], default=[4, 2, 8],
+                   help="euclidean pulses per row, e.g. 4,2,8")
+    p.add_argument("--rotation", type=int, default=0, help="euclidean rotation")
+    p.add_argument("--swing", type=float, default=0.0, help="delay of odd steps, fraction of a step (0-0.5)")
+    p.add_argument("--bpm", type=float, default=DEFAULT_BPM)
+    p.add_argument("--tag", action="append", default=[], help="tag stored presets (repeatable)")
+    p.add_argument("--kit", help="kit name or .json kit file (default: the kick/snare/hat kit)")
+    p.add_argument("-o", "--output", help="preset store, .json or .mid file (default: text on stdout)")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("export", help="export patterns to one MIDI file")
+    p.add_argument("source", help="preset store, .json or .mid file")
+    p.add_argument("-o", "--output", required=True, help="MIDI file to write")
+    p.add_argument("--bpm", type=float, default=DEFAULT_BPM)
+    p.add_argument("--split-rows", action="store_true", help="one track per drum")
+    _add_filters(p)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="import MIDI files into the preset store")
+    p.add_argument("sources", nargs="+", help="folders or MIDI files to import")
+    p.add_argument("-o", "--output", default="presets.db", help="preset store (or .json file) to write")
+    p.add_argument("-j", "--jobs", type=int, help="worker processes (default: all cores)")
+    p.add_argument("--dedupe", choices=["exact", "rotation"], help="skip grooves already in the store")
+    p.add_argument("--kit", help="kit name or .json kit file to map notes to (default: gm)")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("render", help="render patterns to WAV")
+    p.add_argument("source", help="preset store, .json or .mid file")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("-o", "--output", help="render all patterns back to back into one WAV")
+    group.add_argument("--each", metavar="DIR", help="render every pattern to its own WAV in DIR")
+    p.add_argument("--bpm", type=float, default=DEFAULT_BPM)
+    _add_filters(p)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("presets", help="list, show, delete or search presets")
+    p.add_argument("action", choices=["list", "show", "delete", "nearest"])
+    p.add_argument("ids", nargs="*", type=int, help="preset ids (show/delete/nearest)")
+    p.add_argument("--store", default="presets.db")
+    p.add_argument("-k", type=int, default=5, help="neighbours per preset (nearest)")
+    _add_filters(p)
+    p.set_defaults(func=cmd_presets)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
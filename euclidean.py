@@ -0,0 +1,38 @@
+# euclidean.py
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=4096)
+def euclidean(pulses, total, rotation=0):
+    """Return the Euclidean rhythm E(pulses, total) as a tuple of bools.
+
+    Uses the Bresenham form: step i is a hit when (i * pulses) mod total
+    falls below pulses. This spreads the pulses as evenly as Bjorklund's
+    algorithm (same rhythm up to rotation), always starts on a hit and
+    needs no recursion. `rotation` shifts the rhythm later by that many
+    steps.
+    """
+    if total <= 0:
+        return ()
+    pulses = min(max(pulses, 0), total)
+    return tuple(((i - rotation) * pulses) % total < pulses for i in range(total))
+
+
+@lru_cache(maxsize=32)
+def euclidean_table(total):
+    """Return every Euclidean rhythm of length `total` in one array.
+
+    The result has shape (total + 1, total, total) and is indexed as
+    [pulses, rotation, step]. It is cached and read-only; repeated calls
+    for the same length cost a dictionary lookup.
+    """
+    i = np.arange(total)
+    pulses = np.arange(total + 1)[:, None]
+    base = (i[None, :] * pulses) % total < pulses  # [pulses, step]
+    # Every rotation is a gather of the unrotated rhythms
+    shifted = (i[None, :] - i[:, None]) % total  # [rotation, step]
+    table = base[:, shifted]
+    table.flags.writeable = False
+    return table
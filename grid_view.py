@@ -0,0 +1,134 @@
+import flet as ft
+
+VISIBLE_STEPS = 32
+VISIBLE_ROWS = 8
+
+
+class GridView:
+    """Virtualized step grid.
+
+    Only a window of at most VISIBLE_ROWS x VISIBLE_STEPS checkboxes exists
+    at any time, however long the pattern is. Scrolling re-binds the same
+    controls to other cells, and clicks are mapped back through the
+    current window offsets. The pool is rebuilt only when the window size
+    changes.
+    """
+
+    def __init__(self, parent_app):
+        self.parent_app = parent_app
+        self.step_offset = 0
+        self.row_offset = 0
+        self.cells = []
+        self.labels = []
+        self.shown = None  # cell values currently shown in the window
+
+        self.cells_column = ft.Column()
+        self.position_text = ft.Text(size=12)
+        self.step_slider = ft.Slider(min=0, max=1, value=0, on_change=self.scroll_steps, expand=True)
+        self.row_slider = ft.Slider(min=0, max=1, value=0, on_change=self.scroll_rows, expand=True)
+        self.step_scroll = ft.Row([ft.Text("Steps", size=12, width=50), self.step_slider], visible=False)
+        self.row_scroll = ft.Row([ft.Text("Rows", size=12, width=50), self.row_slider], visible=False)
+        self.control = ft.Column([self.cells_column, self.position_text, self.step_scroll, self.row_scroll])
+
+    @property
+    def pattern(self):
+        return self.parent_app.current_pattern
+
+    def _build(self, rows, steps):
+        self.cells_column.controls.clear()
+        self.cells = []
+        self.labels = []
+        for r in range(rows):
+            label = ft.Text("", size=14, width=60)
+            row_cells = []
+            for c in range(steps):
+                row_cells.append(ft.Checkbox(value=False, on_change=lambda e, x=r, y=c: self.on_cell(x, y), scale=1.5))
+            self.cells_column.controls.append(ft.Row([label] + row_cells))
+            self.labels.append(label)
+            self.cells.append(row_cells)
+        self.shown = None
+
+    def refresh(self):
+        """Sync the window with the pattern; returns the controls that changed."""
+        grid = self.pattern.grid
+        total_rows, total_steps = grid.shape
+        rows = min(total_rows, VISIBLE_ROWS)
+        steps = min(total_steps, VISIBLE_STEPS)
+        self.row_offset = max(0, min(self.row_offset, total_rows - rows))
+        self.step_offset = max(0, min(self.step_offset, total_steps - steps))
+
+        changed = []
+        rebuilt = len(self.cells) != rows or (self.cells and len(self.cells[0]) != steps)
+        if rebuilt:
+            self._build(rows, steps)
+            changed.append(self.control)
+
+        view = grid[self.row_offset:self.row_offset + rows, self.step_offset:self.step_offset + steps]
+        if self.shown is None:
+            for r, row_cells in enumerate(self.cells):
+                for c, cell in enumerate(row_cells):
+                    cell.value = bool(view[r, c])
+            if not rebuilt:
+                changed.append(self.cells_column)
+        else:
+            for r, c in zip(*(view != self.shown).nonzero()):
+                cell = self.cells[r][c]
+                cell.value = bool(view[r, c])
+                changed.append(cell)
+        self.shown = view.copy()
+
+        names = self.pattern.kit.labels
+        for r, label in enumerate(self.labels):
+            row = self.row_offset + r
+            text = names[row] if row < len(names) else f"Row {row + 1}"
+            if label.value != text:
+                label.value = text
+                if not rebuilt:
+                    changed.append(label)
+
+        changed.extend(self._update_scrollbars(rows, steps, total_rows, total_steps))
+        return changed
+
+    def _update_scrollbars(self, rows, steps, total_rows, total_steps):
+        changed = []
+        for scroll, slider, offset, visible, total in (
+            (self.step_scroll, self.step_slider, self.step_offset, steps, total_steps),
+            (self.row_scroll, self.row_slider, self.row_offset, rows, total_rows),
+        ):
+            max_offset = total - visible
+            show = max_offset > 0
+            if scroll.visible != show or (show and (slider.max != max_offset or slider.value != offset)):
+                scroll.visible = show
+                if show:
+                    slider.max = max_offset
+                    slider.divisions = max_offset
+                    slider.value = offset
+                changed.append(scroll)
+
+        text = (f"Steps {self.step_offset + 1}-{self.step_offset + steps} of {total_steps}"
+                if total_steps > steps else "")
+        if self.position_text.value != text:
+            self.position_text.value = text
+            changed.append(self.position_text)
+        return changed
+
+    def on_cell(self, r, c):
+        """Map a click in the window back to the pattern cell and toggle it."""
+        row = self.row_offset + r
+        step = self.step_offset + c
+        # The clicked checkbox already shows the new value on the client
+        self.shown[r, c] = not self.shown[r, c]
+        self.parent_app.toggle_step(row, step)
+
+    def scroll_steps(self, e):
+        self.step_offset = int(e.control.value)
+        self._scroll()
+
+    def scroll_rows(self, e):
+        self.row_offset = int(e.control.value)
+        self._scroll()
+
+    def _scroll(self):
+        changed = self.refresh()
+        if changed:
+            self.parent_app.page.update(*changed)
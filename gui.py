@@ -1,12 +1,12 @@
 import flet as ft
 from sequencer import Pattern
-from playback import MidiPlayer
-from midi_export import export_pattern
-from midi_import import import_pattern
-from presets import save_presets, load_presets
-from settings import SettingsWindow
+from grid_view import GridView
 from settings_manager import load_settings, save_settings
 import os
+import threading
+
+# Playback, MIDI, preset and settings modules are imported on first use so
+# launching the app only pays for flet and the pattern grid
 
 class DrumApp:
     def __init__(self, page: ft.Page):
@@ -23,19 +23,49 @@ class DrumApp:
         self.current_pattern = Pattern(16)
         self.patterns.append(self.current_pattern)
         self.bpm = 120
-        self.player = MidiPlayer()
-        self.steps_options = [16, 32, 64]
-        self.settings_window = SettingsWindow(self)
-        
-        # Load saved sound paths
-        sound_paths = self.app_settings.get("sound_paths", {})
-        for note_str, path in sound_paths.items():
-            note = int(note_str)
+        # Budget for decoded samples shared by playback and bouncing
+        cache_mb = self.app_settings.get("sample_cache_mb")
+        if cache_mb:
+            from sample_cache import default_cache
+            default_cache.set_budget(int(cache_mb) * 1024 * 1024)
+        self._player = None
+        self._settings_window = None
+        self.store = None
+        self.task = None
+        self.pending_settings = None
+        self.settings_lock = threading.Lock()
+        self.steps_options = [16, 32, 64, 128, 256]
+
+        # Saved sound paths are applied when the player is created
+        self.saved_sounds = {}
+        for note_str, path in self.app_settings.get("sound_paths", {}).items():
             if os.path.exists(path):
-                self.player.samples[note] = path
+                self.saved_sounds[int(note_str)] = path
 
         self.init_ui()
 
+    @property
+    def player(self):
+        """The MidiPlayer, created on first use so launching does not open the audio device"""
+        if self._player is None:
+            from playback import MidiPlayer
+            player = MidiPlayer()
+            for note, path in self.saved_sounds.items():
+                player.set_sample(note, path)
+            self._player = player
+        return self._player
+
+    @property
+    def playing(self):
+        return self._player is not None and self._player.playing
+
+    @property
+    def settings_window(self):
+        if self._settings_window is None:
+            from settings import SettingsWindow
+            self._settings_window = SettingsWindow(self)
+        return self._settings_window
+
     def apply_theme(self):
         if self.dark_mode:
             self.page.theme_mode = ft.ThemeMode.DARK
@@ -49,7 +79,6 @@ class DrumApp:
         self.left_column = ft.Column(horizontal_alignment=ft.CrossAxisAlignment.START, expand=False)
         self.right_column = ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True)
         self.settings_column = ft.Column(horizontal_alignment=ft.CrossAxisAlignment.START, expand=False, visible=False)
-        self.grid_buttons = []
 
         # Delay creating FilePicker until it's actually needed. Some
         # clients (web) don't support FilePicker and will raise an
@@ -83,6 +112,18 @@ class DrumApp:
         self.left_column.controls.append(ft.Text("Steps per pattern:", size=18, weight="bold"))
         self.left_column.controls.append(self.step_selector)
 
+        # Kit selector: which instruments the pattern rows play
+        from kit import KITS
+        self.kit_selector = ft.Dropdown(
+            options=[ft.dropdown.Option(key=name, text=f"{name} ({len(kit)} rows)") for name, kit in KITS.items()],
+            value=self.current_pattern.kit.name,
+            on_select=self.change_kit,
+            width=200,
+            text_size=16
+        )
+        self.left_column.controls.append(ft.Text("Kit:", size=18, weight="bold"))
+        self.left_column.controls.append(self.kit_selector)
+
         # BPM selector
         self.bpm_selector = ft.TextField(
             value=str(self.bpm),
@@ -95,6 +136,13 @@ class DrumApp:
         self.left_column.controls.append(ft.Text("BPM:", size=18, weight="bold"))
         self.left_column.controls.append(self.bpm_selector)
 
+        # Swing delays every odd step by up to half a step
+        self.swing_slider = ft.Slider(
+            min=0, max=50, divisions=10, value=0, label="{value}%", width=250, on_change=self.change_swing
+        )
+        self.left_column.controls.append(ft.Text("Swing:", size=18, weight="bold"))
+        self.left_column.controls.append(self.swing_slider)
+
         # Buttons
         self.left_column.controls.extend([
             ft.ElevatedButton("Random Pattern", on_click=self.random_pattern, width=250, height=50),
@@ -105,11 +153,19 @@ class DrumApp:
             ft.ElevatedButton("Clear All", on_click=self.clear_all, width=250, height=50),
         ])
 
+        # Progress of the running file job (export, import, saving presets)
+        self.task_label = ft.Text(size=12)
+        self.task_bar = ft.ProgressBar(width=250)
+        self.task_cancel = ft.TextButton("Cancel", on_click=self.cancel_task)
+        self.task_row = ft.Column([self.task_label, self.task_bar, self.task_cancel], visible=False)
+        self.left_column.controls.append(self.task_row)
+
         # Grid and text area
-        self.grid_container = ft.Column(horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True, scroll="auto", height=400, width=1000)
+        self.grid_view = GridView(self)
+        self.grid_container = ft.Column([self.grid_view.control], horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True, scroll="auto", height=400, width=1000)
         self.text_area = ft.TextField(multiline=True, height=150, width=500, text_size=14)
         self.right_column.controls.append(self.grid_container)
-        self.right_column.controls.append(ft.Text("Pattern Text (k=s/h):", size=18, weight="bold"))
+        self.right_column.controls.append(ft.Text("Pattern Text (one row per kit instrument):", size=18, weight="bold"))
         self.right_column.controls.append(self.text_area)
         self.right_column.controls.append(ft.ElevatedButton("Update Grid from Text", on_click=self.update_grid_from_text, width=250, height=50))
 
@@ -117,8 +173,10 @@ class DrumApp:
         self.right_column.controls.append(
             ft.Row([
                 ft.ElevatedButton("Play", on_click=self.play_pattern, width=150, height=50),
+                ft.ElevatedButton("Play Song", on_click=self.play_song, width=150, height=50),
                 ft.ElevatedButton("Stop", on_click=self.stop_pattern, width=150, height=50),
                 ft.ElevatedButton("Export MIDI", on_click=self.export_midi, width=150, height=50),
+                ft.ElevatedButton("Export WAV", on_click=self.export_wav, width=150, height=50),
                 ft.ElevatedButton("Import MIDI", on_click=self.import_midi, width=150, height=50),
             ], alignment=ft.MainAxisAlignment.CENTER)
         )
@@ -138,20 +196,34 @@ class DrumApp:
         self.update_grid()
 
     def update_grid(self, _=None):
-        self.grid_container.controls.clear()
-        self.grid_buttons = []
-        rows = ["Kick", "Snare", "Hi-hat"]
-        for r in range(3):
-            row_buttons = []
-            row = ft.Row()
-            for c in range(self.current_pattern.steps):
-                btn = ft.Checkbox(value=self.current_pattern.grid[r][c], on_change=lambda e, x=r, y=c: self.toggle_step(x, y), scale=1.5)
-                row.controls.append(btn)
-                row_buttons.append(btn)
-            self.grid_container.controls.append(row)
-            self.grid_buttons.append(row_buttons)
-        self.text_area.value = "\n".join(self.current_pattern.to_text())
-        self.page.update()
+        # Rebuild the event table here on the UI thread so a running loop
+        # finds it ready at its next step
+        self.current_pattern.step_hits()
+
+        # Only the visible window of cells exists as controls; the grid view
+        # patches the cells that changed and the text area follows
+        changed = self.grid_view.refresh()
+
+        text = "\n".join(self.current_pattern.to_text())
+        if self.text_area.value != text:
+            self.text_area.value = text
+            changed.append(self.text_area)
+
+        kit = self.current_pattern.kit
+        if self.kit_selector.value != kit.name:
+            self.kit_selector.value = kit.name
+            changed.append(self.kit_selector)
+        if kit is not self.sound_kit:
+            self.create_sound_dropdowns(self.sound_files)
+            changed.append(self.sound_column)
+
+        swing = round(self.current_pattern.swing * 100)
+        if self.swing_slider.value != swing:
+            self.swing_slider.value = swing
+            changed.append(self.swing_slider)
+
+        if changed:
+            self.page.update(*changed)
 
     def toggle_theme(self, _):
         self.dark_mode = not self.dark_mode
@@ -198,8 +270,27 @@ class DrumApp:
                 if file.endswith('.wav'):
                     sound_files[file] = os.path.join(sound_folder, file)
         
-        # Create dropdowns for each drum
+        # Create dropdowns for each row of the current kit
+        self.sound_files = sound_files
+        self.sound_column = ft.Column()
+        self.settings_column.controls.append(self.sound_column)
         self.create_sound_dropdowns(sound_files)
+
+        self.settings_column.controls.append(ft.Divider())
+
+        # MIDI output section: send hits to an external synth instead of
+        # samples. Ports are listed when the panel is first opened.
+        self.settings_column.controls.append(ft.Text("MIDI Output", size=16, weight="bold"))
+        self.output_selector = ft.Dropdown(
+            label="Output",
+            options=[ft.dropdown.Option("Samples")],
+            value="Samples",
+            width=280,
+            text_size=12,
+            on_select=self.change_output
+        )
+        self.output_ports_listed = False
+        self.settings_column.controls.append(self.output_selector)
         
         self.settings_column.controls.append(ft.Divider())
         self.settings_column.controls.append(
@@ -207,16 +298,10 @@ class DrumApp:
         )
 
     def create_sound_dropdowns(self, sound_files):
-        """Create sound selection dropdowns"""
-        from playback import NOTE_KICK, NOTE_SNARE, NOTE_HH
-        
-        drum_types = [
-            ("Kick", "kick", NOTE_KICK),
-            ("Snare", "snare", NOTE_SNARE),
-            ("Hi-Hat", "hihat", NOTE_HH)
-        ]
-        
-        for label, sound_type, note in drum_types:
+        """Create sound selection dropdowns for the rows of the current kit"""
+        self.sound_column.controls.clear()
+        self.sound_kit = self.current_pattern.kit
+        for label, note in zip(self.sound_kit.labels, self.sound_kit.notes.tolist()):
             options = [ft.dropdown.Option("Default")]
             for file in sorted(sound_files.keys()):
                 options.append(ft.dropdown.Option(file))
@@ -226,17 +311,17 @@ class DrumApp:
                 options=options,
                 width=200,
                 text_size=12,
-                on_select=lambda e, st=sound_type, sf=sound_files: self.change_sound(st, e, sf)
+                on_select=lambda e, n=note, sf=sound_files: self.change_sound(n, e, sf)
             )
             
             browse_btn = ft.ElevatedButton(
                 "Browse",
                 width=80,
                 height=40,
-                on_click=lambda e, st=sound_type: self.pick_sound_file(st)
+                on_click=lambda e, n=note: self.pick_sound_file(n)
             )
             
-            self.settings_column.controls.append(
+            self.sound_column.controls.append(
                 ft.Row([
                     ft.Text(f"{label}:", size=12, width=80),
                     dropdown,
@@ -244,47 +329,69 @@ class DrumApp:
                 ], spacing=5)
             )
 
-    def change_sound(self, sound_type, e, sound_files):
-        """Change sound for a drum type"""
-        from playback import NOTE_KICK, NOTE_SNARE, NOTE_HH, SOUND_MAP
-        
-        notes = {
-            "kick": NOTE_KICK,
-            "snare": NOTE_SNARE,
-            "hihat": NOTE_HH
-        }
-        
+    def change_sound(self, note, e, sound_files):
+        """Change sound for a drum note"""
+        from playback import SOUND_MAP
+
         selected_file = e.control.value
-        note = notes.get(sound_type, 36)
         
         if selected_file == "Default":
             if note in SOUND_MAP:
                 if os.path.exists(SOUND_MAP[note]):
-                    self.player.samples[note] = SOUND_MAP[note]
+                    self.player.set_sample(note, SOUND_MAP[note])
         else:
             sound_path = sound_files.get(selected_file)
             if sound_path and os.path.exists(sound_path):
-                self.player.samples[note] = sound_path
+                self.player.set_sample(note, sound_path)
         
         self.save_app_settings()
 
+    def change_output(self, e):
+        """Route playback to a MIDI output port or back to samples"""
+        name = e.control.value
+        if name == "Samples":
+            self.player.set_output(None)
+            return
+        try:
+            from midi_output import MidiOutput
+            self.player.set_output(MidiOutput(name))
+        except Exception as ex:
+            self.player.set_output(None)
+            e.control.value = "Samples"
+            self.page.snack_bar = ft.SnackBar(ft.Text(f"MIDI output failed: {type(ex).__name__}: {ex}"))
+            self.page.snack_bar.open = True
+            self.page.update()
+
     def toggle_settings_panel(self, _):
         """Toggle settings panel visibility"""
         self.settings_column.visible = not self.settings_column.visible
+        if self.settings_column.visible and not self.output_ports_listed:
+            from midi_output import output_names
+            self.output_selector.options += [ft.dropdown.Option(n) for n in output_names()]
+            self.output_ports_listed = True
         self.page.update()
 
     def save_app_settings(self):
-        """Save app settings to file"""
+        """Save app settings to file on a background thread"""
         # Convert player.samples dict to string keys for JSON
         sound_paths = {}
-        for note, path in self.player.samples.items():
+        samples = self._player.sample_paths() if self._player else self.saved_sounds
+        for note, path in samples.items():
             sound_paths[str(note)] = path
-        
-        save_settings(self.dark_mode, sound_paths)
 
-    def pick_sound_file(self, sound_type):
+        # Quick successive changes collapse into one write of the latest settings
+        self.pending_settings = (self.dark_mode, sound_paths, self.app_settings.get("sample_cache_mb"))
+        threading.Thread(target=self.write_app_settings).start()
+
+    def write_app_settings(self):
+        with self.settings_lock:
+            settings, self.pending_settings = self.pending_settings, None
+            if settings is not None:
+                save_settings(*settings)
+
+    def pick_sound_file(self, note):
         """Open file picker to select sound file from PC"""
-        self.current_sound_type = sound_type
+        self.current_sound_note = note
         # Try to create FilePicker lazily (may fail on unsupported clients)
         if not self.file_picker and not self.file_picker_supported:
             try:
@@ -317,17 +424,7 @@ class DrumApp:
         if e.files:
             file_path = e.files[0].path
             if file_path.lower().endswith('.wav'):
-                from playback import NOTE_KICK, NOTE_SNARE, NOTE_HH
-                
-                notes = {
-                    "kick": NOTE_KICK,
-                    "snare": NOTE_SNARE,
-                    "hihat": NOTE_HH
-                }
-                
-                sound_type = self.current_sound_type
-                note = notes.get(sound_type, 36)
-                self.player.samples[note] = file_path
+                self.player.set_sample(self.current_sound_note, file_path)
                 self.save_app_settings()
                 self.page.snack_bar = ft.SnackBar(ft.Text(f"Sound loaded: {os.path.basename(file_path)}"))
                 self.page.snack_bar.open = True
@@ -349,8 +446,27 @@ class DrumApp:
     def change_steps(self, e):
         steps = int(e.control.value)
         self.current_pattern.steps = steps
-        self.current_pattern.grid = [[False] * steps for _ in range(3)]
+        self.current_pattern.clear()
+        self.update_grid()
+
+    def change_kit(self, e):
+        """Move the current pattern onto another kit, keeping matching instruments"""
+        from kit import get_kit
+        old = self.current_pattern
+        self.current_pattern = old.with_kit(get_kit(e.control.value))
+        self.replace_pattern(old, self.current_pattern)
         self.update_grid()
+        if self.playing:
+            self.player.play_pattern(self.current_pattern, self.bpm)
+
+    def replace_pattern(self, old, new):
+        """Swap a pattern in the song (a list or a lazily loaded preset library)"""
+        loaded = getattr(self.patterns, "loaded", None)
+        items = list(loaded.items()) if loaded is not None else enumerate(self.patterns)
+        for i, pattern in items:
+            if pattern is old:
+                self.patterns[i] = new
+                return
 
     def change_bpm(self, e):
         try:
@@ -361,9 +477,14 @@ class DrumApp:
                 e.control.update()
             
             self.bpm = val
+            if self.playing and val > 0:
+                self.player.set_bpm(val)
         except ValueError:
             pass # Keep previous BPM if invalid
 
+    def change_swing(self, e):
+        self.current_pattern.swing = float(e.control.value) / 100
+
     def random_pattern(self, _):
         self.current_pattern.generate_random()
         self.update_grid()
@@ -379,109 +500,198 @@ class DrumApp:
     def play_pattern(self, _):
         self.player.play_pattern(self.current_pattern, self.bpm)
 
+    def play_song(self, _):
+        # Plays every pattern in the list back to back, looping
+        self.player.play_song(self.patterns, self.bpm)
+
     def stop_pattern(self, _):
-        self.player.stop()
+        if self._player:
+            self._player.stop()
 
-    def export_midi(self, _):
-        # Use native tkinter save dialog (Windows File Explorer style) to
-        # ensure a visible save dialog opens for the user. This avoids
-        # client-specific `ft.dialogs` behavior.
-        try:
-            import tkinter as tk
-            from tkinter import filedialog
-            root = tk.Tk()
-            # Hide the root window but make the dialog topmost so it appears
-            # in front of other windows (File Explorer / other apps).
-            root.withdraw()
-            root.update()
-            root.attributes('-topmost', True)
-            path = filedialog.asksaveasfilename(parent=root, defaultextension=".mid", filetypes=[("MIDI Files", "*.mid")], title="Export MIDI")
-            root.attributes('-topmost', False)
-            root.destroy()
-        except Exception as e:
-            self.page.snack_bar = ft.SnackBar(ft.Text(f"Export dialog failed: {type(e).__name__}: {e}"))
-            self.page.snack_bar.open = True
-            self.page.update()
-            return
+    def notify(self, text):
+        self.page.snack_bar = ft.SnackBar(ft.Text(text))
+        self.page.snack_bar.open = True
+        self.page.update()
 
-        if not path:
-            # user canceled
-            return
+    def run_task(self, label, work, on_done, error_label, cancellable=True):
+        """Run work(task) on a worker thread while the progress row shows `label`.
 
-        if not path.endswith('.mid'):
-            path += '.mid'
+        One job runs at a time; on_done(result) is skipped if the job was
+        cancelled.
+        """
+        if self.task is not None:
+            self.notify("Another job is still running")
+            return
+        from tasks import Task
+        self.task_label.value = label
+        self.task_bar.value = None
+        self.task_cancel.visible = cancellable
+        self.task_row.visible = True
+        self.page.update()
+        self.task = Task(
+            work,
+            on_done=on_done,
+            on_error=lambda e: self.notify(f"{error_label}: {type(e).__name__}: {e}"),
+            on_progress=self.task_progress,
+            on_finish=self.task_finished,
+        )
+        self.task.start()
 
-        try:
-            export_pattern([self.current_pattern], self.bpm, path)
-            self.page.snack_bar = ft.SnackBar(ft.Text(f"Exported MIDI to {os.path.basename(path)}"))
-            self.page.snack_bar.open = True
-            self.page.update()
-        except Exception as e:
-            self.page.snack_bar = ft.SnackBar(ft.Text(f"Export error: {type(e).__name__}: {e}"))
-            self.page.snack_bar.open = True
-            self.page.update()
+    def task_progress(self, fraction):
+        self.task_bar.value = fraction
+        self.page.update()
 
-    def import_midi(self, _):
-        # Use native tkinter open dialog
+    def task_finished(self, task):
+        self.task = None
+        self.task_row.visible = False
+        self.page.update()
+        if task.cancelled.is_set():
+            self.notify("Cancelled")
+
+    def cancel_task(self, _):
+        if self.task is not None:
+            self.task.cancel()
+
+    def ask_path(self, save, **options):
+        # Native tkinter dialog (Windows File Explorer style), so a visible
+        # dialog opens whatever the Flet client is. Called on the job's
+        # worker thread; the hidden root lives and dies on that thread.
+        import tkinter as tk
+        from tkinter import filedialog
+        root = tk.Tk()
+        # Hide the root window but make the dialog topmost so it appears
+        # in front of other windows (File Explorer / other apps).
+        root.withdraw()
+        root.update()
+        root.attributes('-topmost', True)
         try:
-            import tkinter as tk
-            from tkinter import filedialog
-            root = tk.Tk()
-            root.withdraw()
-            root.update()
-            root.attributes('-topmost', True)
-            path = filedialog.askopenfilename(parent=root, filetypes=[("MIDI Files", "*.mid"), ("All Files", "*.*")], title="Import MIDI")
+            ask = filedialog.asksaveasfilename if save else filedialog.askopenfilename
+            return ask(parent=root, **options)
+        finally:
             root.attributes('-topmost', False)
             root.destroy()
-        except Exception as e:
-            self.page.snack_bar = ft.SnackBar(ft.Text(f"Import dialog failed: {type(e).__name__}: {e}"))
-            self.page.snack_bar.open = True
-            self.page.update()
-            return
 
-        if not path:
-            return
+    def export_midi(self, _):
+        # Copies are exported, so edits made meanwhile do not race the writer
+        patterns = [self.current_pattern.copy()]
+        bpm = self.bpm
+
+        def work(task):
+            path = self.ask_path(True, defaultextension=".mid", filetypes=[("MIDI Files", "*.mid")], title="Export MIDI")
+            if not path:
+                # user canceled
+                return None
+            if not path.endswith('.mid'):
+                path += '.mid'
+            self.task_label.value = f"Exporting {os.path.basename(path)}"
+            task.progress(0)
+            from midi_export import export_stream
+            export_stream(patterns, bpm, path, progress=lambda n: task.progress(n, len(patterns)))
+            return path
+
+        def done(path):
+            if path:
+                self.notify(f"Exported MIDI to {os.path.basename(path)}")
+
+        self.run_task("Choose where to export MIDI", work, done, "Export error")
+
+    def export_wav(self, _):
+        # Same native save dialog as export_midi, rendering audio offline
+        patterns = [self.current_pattern.copy()]
+        bpm = self.bpm
+        if self._player:
+            samples = self._player.sample_paths()
+        else:
+            from playback import SOUND_MAP
+            samples = dict(SOUND_MAP)
+            samples.update(self.saved_sounds)
+
+        def work(task):
+            path = self.ask_path(True, defaultextension=".wav", filetypes=[("WAV Files", "*.wav")], title="Export WAV")
+            if not path:
+                return None
+            if not path.lower().endswith('.wav'):
+                path += '.wav'
+            self.task_label.value = f"Rendering {os.path.basename(path)}"
+            task.progress(0)
+            from bounce import Bouncer, write_wav
+            bouncer = Bouncer(samples)
+            buffer = bouncer.render(patterns, bpm)
+            task.check()
+            write_wav(path, buffer, bouncer.sample_rate)
+            return path
+
+        def done(path):
+            if path:
+                self.notify(f"Exported WAV to {os.path.basename(path)}")
+
+        self.run_task("Choose where to export WAV", work, done, "Export error")
 
-        try:
-            pattern, bpm = import_pattern(path)
-            if pattern:
-                self.current_pattern = pattern
-                self.patterns = [self.current_pattern] # Replace patterns list for now
-                self.bpm = bpm
-                
-                # Update UI elements
-                self.bpm_selector.value = str(self.bpm)
-                self.step_selector.value = str(self.current_pattern.steps)
-                
-                # Refresh grid
-                self.update_grid()
-                self.page.snack_bar = ft.SnackBar(ft.Text(f"Imported MIDI from {os.path.basename(path)}"))
-                self.page.snack_bar.open = True
-                self.page.update()
-            else:
-                self.page.snack_bar = ft.SnackBar(ft.Text("Failed to import MIDI pattern"))
-                self.page.snack_bar.open = True
-                self.page.update()
+    def import_midi(self, _):
+        def work(task):
+            path = self.ask_path(False, filetypes=[("MIDI Files", "*.mid"), ("All Files", "*.*")], title="Import MIDI")
+            if not path:
+                return None
+            self.task_label.value = f"Importing {os.path.basename(path)}"
+            task.progress(0)
+            from midi_import import load_pattern
+            pattern, bpm = load_pattern(path)
+            return path, pattern, bpm
+
+        def done(result):
+            if result is None:
+                return
+            path, pattern, bpm = result
+            self.current_pattern = pattern
+            self.patterns = [self.current_pattern] # Replace patterns list for now
+            self.bpm = bpm
+
+            # Update UI elements
+            self.bpm_selector.value = str(self.bpm)
+            self.step_selector.value = str(self.current_pattern.steps)
+
+            # Refresh grid
+            self.update_grid()
+            if self.playing:
+                self.player.play_pattern(self.current_pattern, self.bpm)
+            self.notify(f"Imported MIDI from {os.path.basename(path)}")
 
-        except Exception as e:
-            self.page.snack_bar = ft.SnackBar(ft.Text(f"Import error: {type(e).__name__}: {e}"))
-            self.page.snack_bar.open = True
-            self.page.update()
+        self.run_task("Choose a MIDI file to import", work, done, "Import error")
 
     def clear_all(self, _):
         # Clear all steps in the current pattern and refresh UI
-        self.current_pattern.grid = [[False] * self.current_pattern.steps for _ in range(3)]
+        self.current_pattern.clear()
         self.update_grid()
 
+    def get_store(self):
+        if self.store is None:
+            from preset_store import open_store
+            self.store = open_store()
+        return self.store
+
     def save_presets(self, _):
-        save_presets(self.patterns)
+        # Not cancellable: once written, the store's ids must be kept
+        patterns = self.patterns
+        snapshot = patterns if hasattr(patterns, "loaded") else list(patterns)
+
+        def done(saved):
+            # Keep the library if the song was not replaced or extended meanwhile
+            if self.patterns is patterns and len(patterns) == len(saved):
+                self.patterns = saved
+            self.notify(f"Saved {len(saved)} presets")
+
+        self.run_task("Saving presets", lambda task: self.get_store().save(snapshot), done,
+                      "Save error", cancellable=False)
 
     def load_presets(self, _):
-        loaded = load_presets()
-        if loaded:
+        # Only the index is read here; patterns are unpacked on first access
+        loaded = self.get_store().patterns()
+        if len(loaded):
             self.patterns = loaded
             self.current_pattern = self.patterns[0]
             self.update_grid()
+            if self.playing:
+                self.player.play_pattern(self.current_pattern, self.bpm)
 
 
 def main(page: ft.Page):
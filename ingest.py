@@ -0,0 +1,91 @@
+# ingest.py
+"""Headless bulk import of a MIDI groove library into the preset store.
+
+Usage: python ingest.py LIBRARY_DIR [more dirs or .mid files] [-o presets.db] [-j WORKERS]
+
+An output ending in .json is written in the legacy presets.json format.
+"""
+import argparse
+import os
+import sys
+import time
+
+from midi_import import find_midi_files, import_files
+from presets import PresetWriter
+from preset_store import STORE_FILE, PresetStore
+
+
+def _kit(name):
+    if name is None:
+        return None
+    from kit import get_kit
+    try:
+        return get_kit(name)
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+
+
+def collect_paths(sources):
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(find_midi_files(source))
+        else:
+            paths.append(source)
+    return paths
+
+
+def ingest(sources, output=STORE_FILE, max_workers=None, dedupe=None, progress_every=1000, out=sys.stderr,
+           kit=None):
+    """Import every MIDI file in `sources` into `output`; returns (imported, errors).
+
+    `dedupe` ("exact" or "rotation") skips grooves already in the store.
+    `kit` picks the rows notes are mapped to (default: the GM kit).
+    """
+    paths = collect_paths(sources)
+    errors = []
+    start = time.perf_counter()
+
+    def imported_patterns():
+        for i, (path, pattern, bpm, error) in enumerate(import_files(paths, max_workers, kit=kit), 1):
+            if error:
+                errors.append((path, error))
+                print(f"{path}: {error}", file=out)
+            else:
+                yield pattern, {"bpm": bpm, "name": path}
+            if progress_every and i % progress_every == 0:
+                print(f"{i}/{len(paths)} files ({time.perf_counter() - start:.1f}s)", file=out)
+
+    if output.endswith(".json"):
+        imported = 0
+        with PresetWriter(output) as writer:
+            for pattern, meta in imported_patterns():
+                writer.add(pattern, bpm=meta["bpm"], source=meta["name"])
+                imported += 1
+    else:
+        with PresetStore(output) as store:
+            ids = store.add_many(imported_patterns(), dedupe=dedupe)
+            imported = sum(1 for i in ids if i is not None)
+            if dedupe:
+                print(f"Skipped {len(ids) - imported} duplicates", file=out)
+
+    print(f"Imported {imported} patterns, {len(errors)} errors, "
+          f"{time.perf_counter() - start:.1f}s", file=out)
+    return imported, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import MIDI drum loops into the preset store.")
+    parser.add_argument("sources", nargs="+", help="folders or MIDI files to import")
+    parser.add_argument("-o", "--output", default=STORE_FILE, help="preset store (or .json file) to write")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--dedupe", choices=["exact", "rotation"], help="skip grooves already in the store")
+    parser.add_argument("--kit", help="kit name or .json kit file to map notes to (default: gm)")
+    args = parser.parse_args(argv)
+
+    _, errors = ingest(args.sources, args.output, args.jobs, args.dedupe, kit=_kit(args.kit))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# kit.py
+"""Drum kits: which instrument each pattern row plays.
+
+A kit maps rows to a text character, a GM drum note (plus alias notes
+accepted on import) and a sample. Everything the rest of the code needs
+is precomputed as arrays: `notes[row]`, `row_for_note[note]` (a 128-entry
+lookup, -1 for notes outside the kit) and per-row generator
+probabilities, so nothing loops over rows in Python.
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+_BASE_DIR = os.path.dirname(__file__)
+SOUNDS_DIR = os.path.join(_BASE_DIR, "sounds")
+
+Instrument = namedtuple(
+    "Instrument", "label char note aliases sample random fill", defaults=((), None, 0.1, 0.1)
+)
+
+
+def _sound(name):
+    return os.path.join(SOUNDS_DIR, name)
+
+
+class Kit:
+    """Ordered instrument rows of a pattern."""
+
+    def __init__(self, name, instruments):
+        self.name = name
+        self.instruments = tuple(Instrument(*i) for i in instruments)
+        self.labels = [i.label for i in self.instruments]
+        self.chars = "".join(i.char for i in self.instruments)
+        if len(set(self.chars)) != len(self.chars):
+            raise ValueError(f"kit {name!r}: row characters must be unique")
+        self.char_codes = np.frombuffer(self.chars.encode("latin-1"), dtype=np.uint8)
+        self.notes = np.array([i.note for i in self.instruments], dtype=np.int64)
+        self.random_probs = np.array([i.random for i in self.instruments])
+        self.fill_probs = np.array([i.fill for i in self.instruments])
+        self.row_for_note = np.full(128, -1, dtype=np.int16)
+        for row, inst in reversed(list(enumerate(self.instruments))):
+            self.row_for_note[list(inst.aliases)] = row
+        self.row_for_note[self.notes] = np.arange(len(self.notes))
+        self.samples = {i.note: i.sample for i in self.instruments if i.sample}
+
+    def __len__(self):
+        return len(self.instruments)
+
+    def __repr__(self):
+        return f"Kit({self.name!r}, {len(self)} rows)"
+
+    def __reduce__(self):
+        # Pickled by definition so kits can be sent to worker processes
+        return _restore_kit, (self.name, [tuple(i) for i in self.instruments])
+
+    def subset(self, rows, name=None):
+        """Kit made of the given rows of this one."""
+        return Kit(name or f"{self.name}[:{len(rows)}]", [self.instruments[r] for r in rows])
+
+
+def _restore_kit(name, instruments):
+    # Unpickled patterns share the registered kit instead of a copy each
+    kit = KITS.get(name)
+    if kit is not None and [tuple(i) for i in kit.instruments] == instruments:
+        return kit
+    return Kit(name, instruments)
+
+
+# The original three-row kit; its aliases match the old import mapping
+DEFAULT_KIT = Kit("default", [
+    ("Kick", "k", 36, (35,), _sound("kick.wav"), 0.25, 0.3),
+    ("Snare", "s", 38, (37, 39, 40), _sound("snare.wav"), 0.25, 0.5),
+    ("Hi-hat", "h", 42, (44, 46), _sound("hihat.wav"), 0.25, 0.3),
+])
+
+# Sixteen rows covering the common General MIDI drum notes. Instruments
+# without their own sample borrow the closest of the bundled sounds.
+GM_KIT = Kit("gm", [
+    ("Kick", "k", 36, (35,), _sound("kick.wav"), 0.25, 0.3),
+    ("Snare", "s", 38, (40,), _sound("snare.wav"), 0.25, 0.5),
+    ("Closed HH", "h", 42, (), _sound("hihat.wav"), 0.25, 0.3),
+    ("Pedal HH", "p", 44, (), _sound("hihat.wav"), 0.05, 0.05),
+    ("Open HH", "o", 46, (), _sound("hihat.wav"), 0.1, 0.1),
+    ("Clap", "c", 39, (), _sound("snare.wav"), 0.05, 0.1),
+    ("Side Stick", "r", 37, (), _sound("snare.wav"), 0.05, 0.1),
+    ("Floor Tom", "f", 41, (43,), _sound("kick.wav"), 0.05, 0.2),
+    ("Low Tom", "l", 45, (), _sound("kick.wav"), 0.05, 0.2),
+    ("Mid Tom", "m", 47, (48,), _sound("snare.wav"), 0.05, 0.2),
+    ("High Tom", "t", 50, (), _sound("snare.wav"), 0.05, 0.2),
+    ("Crash", "x", 49, (52, 55, 57), _sound("hihat.wav"), 0.02, 0.05),
+    ("Ride", "y", 51, (59,), _sound("hihat.wav"), 0.1, 0.1),
+    ("Ride Bell", "b", 53, (), _sound("hihat.wav"), 0.02, 0.05),
+    ("Tambourine", "a", 54, (), _sound("hihat.wav"), 0.05, 0.05),
+    ("Cowbell", "w", 56, (), _sound("hihat.wav"), 0.02, 0.05),
+])
+
+KITS = {kit.name: kit for kit in (DEFAULT_KIT, GM_KIT)}
+
+
+def register_kit(kit):
+    KITS[kit.name] = kit
+    return kit
+
+
+def load_kit(filename):
+    """Read a kit from JSON and register it.
+
+    The file holds {"name": ..., "rows": [{"label", "char", "note",
+    "aliases", "sample", "random", "fill"}, ...]}; only label, char and
+    note are required. Sample paths are relative to the file.
+    """
+    with open(filename, "r") as f:
+        data = json.load(f)
+    base = os.path.dirname(os.path.abspath(filename))
+    rows = []
+    for row in data["rows"]:
+        sample = row.get("sample")
+        rows.append(Instrument(
+            row["label"], row["char"], int(row["note"]), tuple(row.get("aliases", ())),
+            os.path.join(base, sample) if sample else None,
+            row.get("random", 0.1), row.get("fill", 0.1),
+        ))
+    return register_kit(Kit(data.get("name") or os.path.splitext(os.path.basename(filename))[0], rows))
+
+
+def get_kit(name=None, rows=None):
+    """Look up a kit by name (or JSON path), or pick one with `rows` rows.
+
+    An unknown name raises ValueError, unless `rows` is given too: names
+    read back from stores and presets (e.g. a custom kit that is not
+    loaded) resolve to the first registered kit with that many rows, or
+    the first rows of the GM kit.
+    """
+    if name in KITS:
+        return KITS[name]
+    if name and name.endswith(".json") and os.path.exists(name):
+        return load_kit(name)
+    if rows is None:
+        if name:
+            raise ValueError(f"unknown kit {name!r} (known: {', '.join(KITS)})")
+        return DEFAULT_KIT
+    for kit in KITS.values():
+        if len(kit) == rows:
+            return kit
+    if rows <= len(GM_KIT):
+        return GM_KIT.subset(range(rows))
+    raise ValueError(f"no kit with {rows} rows")
+
+
+def sample_map():
+    """Default note -> sample path over every registered kit."""
+    samples = {}
+    for kit in reversed(list(KITS.values())):
+        samples.update(kit.samples)
+    return samples
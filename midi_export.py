@@ -1,26 +1,190 @@
-from mido import MidiFile, MidiTrack, Message
-import mido
+import heapq
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+PPQ = 480
+DRUM_CHANNEL = 9
+VELOCITY = 100
+
+# Track bodies larger than this spill from memory to a temporary file
+SPOOL_SIZE = 1 << 20
+
+
+def _varlen(value):
+    """Encode a MIDI variable-length quantity."""
+    out = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        out.insert(0, 0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(out)
+
+
+class _Track:
+    """One MTrk chunk body, written incrementally from absolute ticks."""
+
+    def __init__(self):
+        self.body = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        self.tick = 0
+        self.status = None  # running status
+
+    def meta(self, tick, kind, data):
+        self.body.write(_varlen(tick - self.tick) + bytes([0xFF, kind]) + _varlen(len(data)) + data)
+        self.tick = tick
+        self.status = None
+
+    def note(self, buf, tick, note, velocity):
+        # Note-offs are note_on with velocity 0 so running status covers every event
+        buf += _varlen(tick - self.tick)
+        status = 0x90 | DRUM_CHANNEL
+        if status != self.status:
+            buf.append(status)
+            self.status = status
+        buf += bytes((note, velocity))
+        self.tick = tick
+
+    def finish(self, tick):
+        self.meta(max(tick, self.tick), 0x2F, b"")
+
+    def copy_to(self, out):
+        size = self.body.tell()
+        out.write(b"MTrk" + struct.pack(">I", size))
+        self.body.seek(0)
+        shutil.copyfileobj(self.body, out)
+        self.body.close()
+
+
+class MidiStreamWriter:
+    """Streams patterns into a format 1 Standard MIDI File.
+
+    Track 0 carries tempo and time signature; drum hits go to one track,
+    or with `split_rows` to one track per instrument (note), created as
+    each note first appears so any kit works. Events are written as
+    deltas from absolute ticks, and hits on the same tick share that tick.
+    Hits carry the pattern's velocities, tick offsets and swing; patterns
+    without velocities use `velocity`. Each note is released one step
+    later, or right before its next hit when that comes sooner, and
+    released notes are written before new hits on the same tick. Track
+    bodies are spooled (to disk once large), so memory stays flat however
+    many patterns are written.
+    """
+
+    def __init__(self, target, bpm, ppq=PPQ, split_rows=False, velocity=VELOCITY):
+        self.target = target
+        self.ppq = ppq
+        self.step_ticks = ppq // 4
+        self.velocity = velocity
+        self.tick = 0
+        self.last_tick = 0  # latest event written; hits never go before it
+        self.pending_off = []  # heap of (tick, note)
+        self.off_at = {}  # note -> tick of its live pending release
+
+        self.tempo_track = _Track()
+        tempo = int(round(60_000_000 / bpm))
+        self.tempo_track.meta(0, 0x51, tempo.to_bytes(3, "big"))
+        self.tempo_track.meta(0, 0x58, bytes([4, 2, 24, 8]))  # 4/4
+
+        self.split_rows = split_rows
+        self.tracks = [] if split_rows else [_Track()]
+        self.track_for = {}
+
+    def _track(self, note):
+        if not self.split_rows:
+            return self.tracks[0]
+        track = self.track_for.get(note)
+        if track is None:
+            track = self.track_for[note] = _Track()
+            self.tracks.append(track)
+        return track
+
+    def _flush_offs(self, upto, bufs):
+        while self.pending_off and self.pending_off[0][0] <= upto:
+            tick, note = heapq.heappop(self.pending_off)
+            if self.off_at.get(note) != tick:
+                continue  # released early by a retrigger
+            del self.off_at[note]
+            track = self._track(note)
+            track.note(bufs.setdefault(track, bytearray()), tick, note, 0)
+
+    def write_pattern(self, pattern):
+        bufs = {}
+        notes, steps, velocities, delays = pattern.hits()
+        ticks = self.tick + np.round((steps + delays) * self.step_ticks).astype(np.int64)
+        order = np.argsort(ticks, kind="stable")
+        if pattern.velocity is None:
+            velocities = np.full(len(notes), self.velocity)
+        for tick, note, velocity in zip(ticks[order].tolist(), notes[order].tolist(),
+                                        velocities[order].tolist()):
+            # A hit pushed ahead of the first step cannot go before what
+            # the previous pattern already wrote
+            tick = max(tick, self.last_tick)
+            self._flush_offs(tick, bufs)
+            track = self._track(note)
+            buf = bufs.setdefault(track, bytearray())
+            if note in self.off_at:
+                # Still sounding (swing or offsets moved hits closer than a
+                # step): release it here so its old release cannot cut this hit
+                track.note(buf, tick, note, 0)
+            track.note(buf, tick, note, velocity)
+            self.off_at[note] = tick + self.step_ticks
+            heapq.heappush(self.pending_off, (tick + self.step_ticks, note))
+            self.last_tick = tick
+        self.tick += pattern.steps * self.step_ticks
+        for track, buf in bufs.items():
+            track.body.write(buf)
+
+    def close(self):
+        bufs = {}
+        self._flush_offs(float("inf"), bufs)
+        for track, buf in bufs.items():
+            track.body.write(buf)
+        if not self.tracks:
+            self.tracks.append(_Track())
+        tracks = [self.tempo_track] + self.tracks
+        for track in tracks:
+            track.finish(self.tick)
+
+        header = b"MThd" + struct.pack(">IHHH", 6, 1, len(tracks), self.ppq)
+        if hasattr(self.target, "write"):
+            self.target.write(header)
+            for track in tracks:
+                track.copy_to(self.target)
+        else:
+            with open(self.target, "wb") as f:
+                f.write(header)
+                for track in tracks:
+                    track.copy_to(f)
+
+    def abort(self):
+        """Discard everything written so far without touching the target."""
+        for track in [self.tempo_track] + self.tracks:
+            track.body.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def export_stream(patterns, bpm, target, split_rows=False, progress=None):
+    """Write an iterable (or generator) of patterns to a MIDI path or stream.
+
+    `progress(count)` is called after each pattern; raising from it
+    aborts the export and leaves the target untouched.
+    """
+    with MidiStreamWriter(target, bpm, split_rows=split_rows) as writer:
+        for count, pat in enumerate(patterns, 1):
+            writer.write_pattern(pat)
+            if progress:
+                progress(count)
+
 
 def export_pattern(patterns, bpm, filename):
-    mid = MidiFile()
-    track = MidiTrack()
-    mid.tracks.append(track)
-
-    tempo = int(60_000_000 / bpm)
-    track.append(mido.MetaMessage('set_tempo', tempo=tempo))
-
-    ppq = mid.ticks_per_beat
-    step_ticks = ppq // 4
-
-    for pat in patterns:
-        events = pat.get_events()
-        steps = pat.steps
-        for step in range(steps):
-            notes = [note for note, c in events if c == step]
-            for n in notes:
-                track.append(Message('note_on', channel=9, note=n, velocity=100, time=0))
-                track.append(Message('note_off', channel=9, note=n, velocity=0, time=step_ticks))
-            if not notes:
-                track.append(Message('note_on', channel=9, note=36, velocity=0, time=step_ticks))
-
-    mid.save(filename)
+    export_stream(patterns, bpm, filename)
@@ -1,61 +1,150 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import mido
-from sequencer import Pattern, NOTE_KICK, NOTE_SNARE, NOTE_HH
+import numpy as np
+
+from kit import GM_KIT
+from sequencer import DEFAULT_VELOCITY, MAX_OFFSET, MIN_OFFSET, STEP_TICKS, Pattern
+
+DEFAULT_BPM = 120
+# MIDI files play at 120 BPM until their first set_tempo
+DEFAULT_TEMPO = 500000
+MIDI_EXTENSIONS = (".mid", ".midi")
+
+# Files are imported onto the 16-row General MIDI kit by default, so toms,
+# cymbals and percussion are kept; the kit's note lookup picks the rows.
+IMPORT_KIT = GM_KIT
+
+
+def _steps_per_bar(numerator, denominator):
+    return max(1, int(round(numerator * 16 / denominator)))
+
+
+def _pattern_length(last_step, signatures):
+    """Round up to the end of the bar holding `last_step`.
+
+    `signatures` is a list of (step, steps_per_bar) sorted by step; a
+    change that does not fall on a bar line starts a new bar there.
+    """
+    bar_start, bar_len = 0, 16
+    for at, length in signatures:
+        if at > last_step:
+            break
+        bar_start, bar_len = at, length
+    bars = max(1, -(-(last_step + 1 - bar_start) // bar_len))
+    return bar_start + bars * bar_len
+
+
+def load_pattern(filename, kit=None):
+    """Parse a MIDI file into (Pattern, bpm), raising on errors.
+
+    All tracks are walked once through mido's merged iterator; tempo,
+    time signature and note events are collected in the same pass. The
+    BPM is the tempo in effect at the first hit and the pattern length
+    follows the time signatures (16 steps per 4/4 bar). Hits snap to the
+    nearest step; their velocity and distance from the step are kept as
+    the pattern's groove (arrays are only allocated if some hit differs
+    from the defaults). Notes the kit (IMPORT_KIT by default) has no row
+    for are skipped.
+    """
+    kit = kit or IMPORT_KIT
+    mid = mido.MidiFile(filename)
+    ticks_per_step = mid.ticks_per_beat / 4
+
+    tempo = DEFAULT_TEMPO  # until the first set_tempo, as in mido
+    signatures = []
+    positions = []  # in steps, unquantized
+    notes = []
+    velocities = []
+    tempos = []  # tempo in effect at each hit
+
+    abs_time = 0
+    for msg in mido.merge_tracks(mid.tracks):
+        abs_time += msg.time
+        kind = msg.type
+        if kind == 'note_on':
+            if msg.velocity > 0:
+                positions.append(abs_time / ticks_per_step)
+                notes.append(msg.note)
+                velocities.append(msg.velocity)
+                tempos.append(tempo)
+        elif kind == 'set_tempo':
+            tempo = msg.tempo
+        elif kind == 'time_signature':
+            at = int(round(abs_time / ticks_per_step))
+            signatures.append((at, _steps_per_bar(msg.numerator, msg.denominator)))
+
+    rows = kit.row_for_note[np.array(notes, dtype=np.int64)]
+    known = np.nonzero(rows >= 0)[0]
+    rows = rows[known]
+
+    if len(known):
+        tempo = tempos[known[0]]
+    bpm = int(round(mido.tempo2bpm(tempo)))
+
+    positions = np.array(positions)[known]
+    steps = np.round(positions).astype(np.int64)
+    last_step = int(steps.max()) if len(steps) else 0
+    pattern = Pattern(_pattern_length(last_step, signatures), kit)
+
+    # Fill grid and groove
+    if len(steps):
+        pattern.set_cells(rows, steps)
+        velocities = np.array(velocities)[known]
+        if (velocities != DEFAULT_VELOCITY).any():
+            velocity = np.full(pattern.grid.shape, DEFAULT_VELOCITY)
+            velocity[rows, steps] = velocities
+            pattern.velocity = velocity
+        offsets = np.clip(np.round((positions - steps) * STEP_TICKS), MIN_OFFSET, MAX_OFFSET)
+        if offsets.any():
+            offset = np.zeros(pattern.grid.shape)
+            offset[rows, steps] = offsets
+            pattern.offset = offset
+
+    return pattern, bpm
+
 
 def import_pattern(filename):
     try:
-        mid = mido.MidiFile(filename)
+        return load_pattern(filename)
     except Exception as e:
         print(f"Error loading MIDI file: {e}")
-        return None, 120
-
-    # Determine BPM (default 120)
-    bpm = 120
-    for track in mid.tracks:
-        for msg in track:
-            if msg.type == 'set_tempo':
-                bpm = int(mido.tempo2bpm(msg.tempo))
-                break
-    
-    # Grid mapping
-    # Kick: 35 (Acoustic Bass Drum), 36 (Bass Drum 1)
-    # Snare: 38 (Acoustic Snare), 40 (Electric Snare)
-    # Hi-Hat: 42 (Closed HH), 44 (Pedal HH), 46 (Open HH)
-    NOTE_MAP = {
-        35: 0, 36: 0,
-        38: 1, 40: 1,
-        42: 2, 44: 2, 46: 2
-    }
-    
-    # Find active steps
-    hits = []  # List of (step_index, row_index)
-    
-    ticks_per_beat = mid.ticks_per_beat
-    ticks_per_step = ticks_per_beat / 4
-    
-    max_step = 15 # Minimum 16 steps
-    
-    for track in mid.tracks:
-        abs_time = 0
-        for msg in track:
-            abs_time += msg.time
-            
-            if msg.type == 'note_on' and msg.velocity > 0:
-                if msg.note in NOTE_MAP:
-                    step = int(round(abs_time / ticks_per_step))
-                    hits.append((step, NOTE_MAP[msg.note]))
-                    if step > max_step:
-                        max_step = step
-
-    # Determine pattern length (nearest multiple of 16)
-    pattern_steps = max_step + 1
-    if pattern_steps % 16 != 0:
-        pattern_steps = ((pattern_steps // 16) + 1) * 16
-        
-    pattern = Pattern(pattern_steps)
-    
-    # Fill grid
-    for step, row in hits:
-        if step < pattern_steps:
-            pattern.grid[row][step] = True
-            
-    return pattern, bpm
+        return None, DEFAULT_BPM
+
+
+def find_midi_files(folder):
+    """Return every MIDI file below `folder`, sorted."""
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.lower().endswith(MIDI_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def _import_one(filename, kit=None):
+    try:
+        pattern, bpm = load_pattern(filename, kit)
+        return pattern, bpm, None
+    except Exception as e:
+        return None, DEFAULT_BPM, f"{type(e).__name__}: {e}"
+
+
+def import_files(paths, max_workers=None, chunksize=16, kit=None):
+    """Import MIDI files in parallel, yielding (path, pattern, bpm, error).
+
+    Results stream back in input order as workers finish them. A file that
+    fails to parse yields a None pattern and an error message instead of
+    stopping the batch.
+    """
+    paths = list(paths)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(_import_one, paths, [kit] * len(paths), chunksize=chunksize)
+        for path, (pattern, bpm, error) in zip(paths, results):
+            yield path, pattern, bpm, error
+
+
+def import_folder(folder, max_workers=None, kit=None):
+    """Import every MIDI file below `folder` in parallel (see import_files)."""
+    return import_files(find_midi_files(folder), max_workers=max_workers, kit=kit)
@@ -0,0 +1,145 @@
+# midi_output.py
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+import mido
+
+DRUM_CHANNEL = 9  # MIDI channel 10
+
+
+def output_names():
+    """Names of the available MIDI output ports (empty if no backend is installed)."""
+    try:
+        return mido.get_output_names()
+    except Exception:
+        return []
+
+
+class MidiOutput:
+    """Sends drum hits to a MIDI output port instead of playing samples.
+
+    The player hands over each step slightly early with its deadline;
+    every hit becomes a timed note_on and a note_off `gate_steps` steps
+    later. `send_step` only appends the step to a deque, so the timing
+    thread never waits on a lock. A sender thread moves handed-over
+    steps into its own time-ordered heap, waits for the next due time
+    (short sleeps of at most `poll`, then a spin like the step
+    scheduler) and sends everything due at that moment back to back, so
+    the hits of one tick go out as one batch and grooved hits leave at
+    their own offset. A hit on a note that is still sounding releases it
+    right before the new note_on, and the older hit's scheduled release
+    is then dropped, so a gate never cuts a newer hit short. After `park_after` idle seconds the sender sleeps
+    until the next step arrives. Pass an open port (any object with
+    send() and close()) for testing, or a port name; `virtual=True`
+    creates a virtual port other apps can connect to.
+    """
+
+    def __init__(self, name=None, port=None, virtual=False, gate_steps=1,
+                 spin=0.001, poll=0.002, park_after=1.0, clock=time.perf_counter, sleep=time.sleep):
+        self.port = port if port is not None else mido.open_output(name, virtual=virtual)
+        self.gate_steps = max(1, gate_steps)
+        self.spin = spin
+        self.poll = poll
+        self.park_after = park_after
+        self.clock = clock
+        self.sleep = sleep
+        self._inbox = deque()  # (epoch, [(time, message, its note_on), ...]) from send_step
+        self._queue = []  # heap of (time, order, epoch, message, its note_on); sender thread only
+        self._order = itertools.count()
+        self._epoch = 0  # bumped by all_off; older queued messages are dropped
+        self._sounding = {}  # note -> the note_on that is sounding
+        self._send_lock = threading.Lock()  # port access: sender thread and all_off
+        self._parked = False
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send_step(self, hits, deadline, step_time):
+        """Queue a step's (note, velocity, delay) hits; delays are in steps."""
+        if not hits:
+            return
+        gate = self.gate_steps * step_time
+        messages = []
+        for note, velocity, delay in hits:
+            at = deadline + delay * step_time
+            on = mido.Message('note_on', channel=DRUM_CHANNEL, note=note, velocity=velocity)
+            messages.append((at, on, on))
+            messages.append((at + gate, mido.Message('note_off', channel=DRUM_CHANNEL, note=note, velocity=0), on))
+        self._inbox.append((self._epoch, messages))
+        if self._parked:
+            # Only after a long silence; steady playback never gets here
+            self._wake.set()
+
+    def _drain(self):
+        while self._inbox:
+            epoch, messages = self._inbox.popleft()
+            for at, msg, on in messages:
+                heapq.heappush(self._queue, (at, next(self._order), epoch, msg, on))
+
+    def _run(self):
+        queue = self._queue
+        idle_since = self.clock()
+        while not self._closed:
+            self._drain()
+            now = self.clock()
+            if not queue:
+                if now - idle_since < self.park_after:
+                    self.sleep(self.poll)
+                    continue
+                self._parked = True
+                # Re-check after publishing `_parked`, so a step handed over
+                # in between is not left waiting
+                if not self._inbox and not self._closed:
+                    self._wake.wait()
+                self._wake.clear()
+                self._parked = False
+                idle_since = self.clock()
+                continue
+            idle_since = now
+            target = queue[0][0]
+            wait = target - now
+            if wait > self.spin:
+                # Short sleeps so steps handed over meanwhile are picked up
+                self.sleep(min(wait - self.spin, self.poll))
+                continue
+            while self.clock() < target:
+                pass
+            now = self.clock()
+            batch = []
+            while queue and queue[0][0] <= now:
+                batch.append(heapq.heappop(queue)[2:])
+            with self._send_lock:
+                for epoch, msg, on in batch:
+                    if epoch != self._epoch:
+                        continue
+                    sounding = self._sounding.get(msg.note)
+                    if msg.type == 'note_on':
+                        if sounding is not None:
+                            # Retrigger: release the earlier hit first
+                            self.port.send(mido.Message('note_off', channel=DRUM_CHANNEL, note=msg.note, velocity=0))
+                        self.port.send(msg)
+                        self._sounding[msg.note] = msg
+                    elif sounding is on:
+                        # Only the release of the hit that is still sounding
+                        self.port.send(msg)
+                        del self._sounding[msg.note]
+
+    def all_off(self):
+        """Drop queued hits and release every sounding note (call when playback stops)."""
+        with self._send_lock:
+            self._epoch += 1
+            self._inbox.clear()
+            for note in sorted(self._sounding):
+                self.port.send(mido.Message('note_off', channel=DRUM_CHANNEL, note=note, velocity=0))
+            self._sounding.clear()
+
+    def close(self):
+        self.all_off()
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.port.close()
@@ -1,25 +1,158 @@
-import time
 import threading
 import os
-import playsound3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from kit import sample_map
+from scheduler import StepScheduler
+from sequencer import DEFAULT_VELOCITY, MIN_OFFSET, STEP_TICKS
 
 NOTE_KICK = 36
 NOTE_SNARE = 38
 NOTE_HH = 42
 
-# Use absolute paths relative to this module so sounds are found regardless
-# of the current working directory when the app is launched.
-_BASE_DIR = os.path.dirname(__file__)
-SOUND_MAP = {
-    NOTE_KICK: os.path.join(_BASE_DIR, "sounds", "kick.wav"),
-    NOTE_SNARE: os.path.join(_BASE_DIR, "sounds", "snare.wav"),
-    NOTE_HH: os.path.join(_BASE_DIR, "sounds", "hihat.wav")
-}
+# Default sample for every note of the known kits, as absolute paths so
+# sounds are found regardless of the current working directory
+SOUND_MAP = sample_map()
+
+# Earliest a grooved hit may sound before its step, in steps
+EARLIEST = -MIN_OFFSET / STEP_TICKS
+
+# How often (seconds) the bar preparing thread checks for a new bar
+PREPARE_POLL = 0.01
+
+class SongCursor:
+    """Walks an arrangement of (pattern, repeats) entries one step at a time.
+
+    Each step yields the pattern's (note, velocity, delay) hits. Edits to
+    the playing pattern are picked up at the next step: the cursor
+    compares the pattern's version with the one its hit table came from
+    and re-reads the table when they differ.
+
+    With `background=True` the bar after the current one is resolved (a
+    LazyPatterns entry may read and decode a preset) and its hit table
+    built by another thread calling `prepare_next()` while the current
+    bar plays. It is published as one plain attribute, tagged with the
+    position it follows, and the stepping thread only reads it at the
+    boundary. If it is not ready in time the current bar plays again
+    rather than waiting. Without background preparation the next bar is
+    prepared inline at the boundary.
+    """
+
+    def __init__(self, entries, loop=True, background=False):
+        self.entries = entries
+        self.loop = loop
+        self.background = background
+        self.position = (0, 0)  # (index, repeat) of the current bar
+        self.step = 0
+        self.done = False
+        self._next = None  # (position it follows, ((index, repeat), pattern) or None)
+
+        first = self._first_playable(0)
+        if first is None:
+            self.done = True
+            self.pattern = None
+        else:
+            self.position = (first, 0)
+            self._enter(self._entry(first)[0])
+
+    def _enter(self, pattern):
+        self.pattern = pattern
+        self.version = pattern.version
+        self.events = pattern.step_hits()
+
+    def _entry(self, index):
+        entry = self.entries[index]
+        if hasattr(entry, "step_events"):
+            return entry, 1
+        return entry[0], int(entry[1])
+
+    def _playable(self, index):
+        pattern, repeats = self._entry(index)
+        return repeats > 0 and pattern.steps > 0
+
+    def _first_playable(self, start):
+        for index in range(start, len(self.entries)):
+            if self._playable(index):
+                return index
+        return None
+
+    def _next_position(self, index, repeat):
+        """(index, repeat) of the bar after the given one, or None at the end."""
+        if repeat + 1 < self._entry(index)[1]:
+            return index, repeat + 1
+        following = self._first_playable(index + 1)
+        if following is None and self.loop:
+            following = self._first_playable(0)
+        return None if following is None else (following, 0)
+
+    @property
+    def index(self):
+        return self.position[0]
+
+    @property
+    def repeat(self):
+        return self.position[1]
+
+    def _prepare(self, index, repeat):
+        # Resolve the bar after the given one and build its hit table
+        position = self._next_position(index, repeat)
+        if position is None:
+            return None
+        pattern = self._entry(position[0])[0]
+        pattern.step_hits()
+        return position, pattern
+
+    def prepare_next(self):
+        """Prepare the bar after the current one unless it is ready (call off the timing thread)."""
+        position = self.position
+        ready = self._next
+        if self.done or (ready is not None and ready[0] == position):
+            return
+        self._next = (position, self._prepare(*position))
+
+    def advance(self):
+        """Return the hits of the current step and move to the next one."""
+        if self.pattern.version != self.version:
+            self._enter(self.pattern)
+            if self.step >= len(self.events):
+                # The pattern got shorter; wrap to its start
+                self.step = 0
+        notes = self.events[self.step]
+        self.step += 1
+        if self.step >= len(self.events):
+            ready = self._next
+            if ready is not None and ready[0] == self.position:
+                prepared = ready[1]
+            elif self.background:
+                # The preparing thread fell behind; play this bar again
+                # rather than wait for it
+                prepared = (self.position, self.pattern)
+            else:
+                prepared = self._prepare(*self.position)
+            if prepared is None:
+                self.done = True
+            else:
+                self.step = 0
+                self._enter(prepared[1])
+                self.position = prepared[0]
+        return notes
+
+    def handoff(self, other):
+        """Continue at the same position within the bar on another cursor."""
+        if not other.done and other.events:
+            other.step = self.step % len(other.events)
+        return other
+
 
 class MidiPlayer:
-    def __init__(self):
+    def __init__(self, engine=None, output=None):
         self.playing = False
+        # Optional MidiOutput; when set, hits go to the MIDI port instead of samples
+        self.output = output
         self.thread = None
+        self.scheduler = None
+        self._handoff = None
+        self.step_time = 0.0
         self.samples = {}
 
         # Store valid file paths
@@ -29,40 +162,239 @@ class MidiPlayer:
             else:
                 print(f"Warning: sound file not found: {path}")
 
-    def send_note(self, note):
-        path = self.samples.get(note)
-        if path:
+        # Kit changes are decoded on a background worker and published as a
+        # new (paths, buffers) pair in `_staged`; the playback thread adopts
+        # it at the next step boundary and only ever plays those decoded
+        # buffers, so it never touches the sample cache or the disk.
+        # `samples` and `buffers` are never mutated in place.
+        self.buffers = {}
+        self._requested = dict(self.samples)
+        self._staged = (self.samples, self.buffers)
+        self._loader = ThreadPoolExecutor(max_workers=1)  # sample decoding only
+        self._cursor = None
+        self._preparer = None
+
+        # Mix decoded samples in-process; fall back to playsound3 when no
+        # audio device (or numpy/sounddevice) is available
+        self.engine = engine if engine is not None else self._open_engine()
+        if self.engine is not None:
+            self._stage(dict(self.samples))
+
+    def _open_engine(self):
+        try:
+            from audio_engine import AudioEngine
+            engine = AudioEngine()
+            engine.start()
+            return engine
+        except Exception as e:
+            print(f"Warning: audio engine unavailable, using playsound3: {e}")
+            return None
+
+    def sample_paths(self):
+        """Return the latest requested note -> path mapping."""
+        return dict(self._requested)
+
+    def set_sample(self, note, path):
+        """Swap the sample for a note without stalling playback.
+
+        Returns a Future that completes once the sample is decoded and
+        staged; a running loop starts using it at its next step.
+        """
+        self._requested = dict(self._requested)
+        self._requested[note] = path
+        return self._loader.submit(self._stage, dict(self._requested))
+
+    def set_samples(self, samples):
+        """Swap a whole kit (note -> path) at once, like set_sample."""
+        self._requested = dict(self._requested)
+        self._requested.update(samples)
+        return self._loader.submit(self._stage, dict(self._requested))
+
+    def _stage(self, samples):
+        # Runs on the loader thread: the only place samples are read from disk
+        buffers = {}
+        if self.engine is not None:
+            previous, previous_buffers = self._staged
+            for note, path in list(samples.items()):
+                try:
+                    buffers[note] = self.engine.load(path)
+                except Exception as e:
+                    # Keep the sound that is currently playing for this note
+                    print(f"Warning: could not load sound {path}: {e}")
+                    if note in previous_buffers:
+                        samples[note] = previous[note]
+                        buffers[note] = previous_buffers[note]
+                    else:
+                        del samples[note]
+        self._staged = (samples, buffers)
+        if not self.playing:
+            self.samples, self.buffers = samples, buffers
+
+    def _adopt_staged(self):
+        # Called on the playback thread at a step boundary; a single
+        # reference read, so no lock is needed
+        staged = self._staged
+        if staged[0] is not self.samples:
+            self.samples, self.buffers = staged
+
+    def _lookahead(self):
+        # Hand steps over early enough that hits grooved ahead of the grid
+        # can still be placed on time; the engine also needs a couple of
+        # blocks to put each hit on its exact frame. playsound3 can only
+        # play immediately.
+        if self.output is None and self.engine is None:
+            return 0.0
+        lookahead = EARLIEST * self.step_time
+        if self.output is None:
+            lookahead += 2 * self.engine.block_size / self.engine.sample_rate
+        else:
+            # The MIDI sender picks up handed-over steps every `poll` seconds
+            lookahead += self.output.poll
+        return lookahead
+
+    def set_output(self, output):
+        """Switch between a MidiOutput (or None for samples) while playing or stopped."""
+        old = self.output
+        self.output = output
+        if self.scheduler:
+            self.scheduler.lookahead = self._lookahead()
+        if old is not None and old is not output:
+            old.close()
+
+    def send_note(self, note, when=None, gain=1.0):
+        if self.engine is not None:
+            buf = self.buffers.get(note)
+            if buf is None:
+                return
+            frame = self.engine.frame_for_time(when) if when is not None else None
+            self.engine.trigger(buf, frame, gain)
+        else:
+            path = self.samples.get(note)
+            if not path:
+                return
+            import playsound3
             # non-blocking playback
             playsound3.playsound(path, block=False)
 
     def play_pattern(self, pattern, bpm):
+        self.play_song([pattern], bpm, loop=True)
+
+    def play_song(self, entries, bpm, loop=True):
+        """Play patterns back to back on one continuous clock.
+
+        `entries` is a sequence of patterns or (pattern, repeats) pairs and
+        is indexed lazily, so a LazyPatterns library works as well. The
+        scheduler never restarts between patterns; the next pattern is
+        loaded and its event table prepared on a separate thread during
+        the current one (not the sample loader, so a slow kit swap cannot
+        hold up a bar).
+
+        If already playing, the new song takes over at the next step
+        without restarting the clock, and `bpm` applies from that step.
+        """
         if self.playing:
+            new = SongCursor(entries, loop, background=True)
+            if not new.done:
+                self._handoff = new
+            self.set_bpm(bpm)
+            return
+        if self.thread:
+            # A song that ran to its end leaves finished threads behind
+            self.thread.join()
+            self.thread = None
+            self._preparer.join()
+            self._preparer = None
+
+        cursor = SongCursor(entries, loop, background=True)
+        if cursor.done:
             return
 
         self.playing = True
+        self._handoff = None
+        if self.engine is not None:
+            # Re-check the kit on disk (edited or deleted files) on the
+            # loader; the timing thread picks up the result at a step
+            self._loader.submit(self._stage, dict(self._requested))
         step_time = 60.0 / bpm / 4.0
-        steps = pattern.steps
-        events = pattern.get_events()
-
-        print(step_time)
-
-        def run():
-            while self.playing:
-                for step in range(steps):
-                    
-                    if not self.playing:
-                        break
-                    for note, c in events:
-                        if c == step:
-                            print(f"Playing step {step}")
-                            self.send_note(note)
-                    time.sleep(step_time)
-
-        self.thread = threading.Thread(target=run)
+        self.step_time = step_time
+        adopted = None
+
+        def fire(n, deadline):
+            try:
+                play_step(deadline)
+            except Exception as e:
+                # Stop cleanly instead of leaving a dead thread with playing set
+                print(f"Playback stopped: {type(e).__name__}: {e}")
+                self.playing = False
+                if self.output is not None:
+                    self.output.all_off()
+
+        def play_step(deadline):
+            nonlocal cursor, adopted
+            # Updated by the scheduler itself when the tempo changes
+            step_time = self.scheduler.step_time
+            self._adopt_staged()
+            # Pick up a song handed over from another thread. The slot is
+            # only ever written by the caller and compared by identity here,
+            # so no lock is needed and no handoff can be lost.
+            handoff = self._handoff
+            if handoff is not adopted:
+                adopted = handoff
+                cursor = cursor.handoff(handoff)
+                self._cursor = cursor
+            hits = cursor.advance()
+            output = self.output
+            if output is not None:
+                output.send_step(hits, deadline, step_time)
+            else:
+                for note, velocity, delay in hits:
+                    self.send_note(note, deadline + delay * step_time, velocity / DEFAULT_VELOCITY)
+            if cursor.done:
+                self.playing = False
+
+        self._cursor = cursor
+        self._preparer = threading.Thread(target=self._prepare_bars, daemon=True)
+        self._preparer.start()
+
+        self.scheduler = StepScheduler(step_time, lookahead=self._lookahead())
+        self.thread = threading.Thread(
+            target=self.scheduler.run, args=(fire, lambda: self.playing)
+        )
         self.thread.start()
 
+    def _prepare_bars(self):
+        # Keeps the next bar of the playing song (and of a song waiting to
+        # take over) ready; the timing thread only reads what is published
+        while self.playing:
+            for cursor in (self._cursor, self._handoff):
+                if cursor is not None:
+                    cursor.prepare_next()
+            time.sleep(PREPARE_POLL)
+
+    def set_bpm(self, bpm):
+        """Change the tempo; while playing it applies from the next step."""
+        self.step_time = 60.0 / bpm / 4.0
+        if self.scheduler:
+            self.scheduler.lookahead = self._lookahead()
+            self.scheduler.set_step_time(self.step_time)
+
+    def timing(self):
+        """Return (mean, max) step lateness in seconds of the current/last run."""
+        if not self.scheduler:
+            return 0.0, 0.0
+        return self.scheduler.stats()
+
+    def timing_report(self):
+        """Return the TimingRecorder of the current/last run (None before the first play)."""
+        return self.scheduler.recorder if self.scheduler else None
+
     def stop(self):
         self.playing = False
         if self.thread:
             self.thread.join()
             self.thread = None
+        if self._preparer:
+            self._preparer.join()
+            self._preparer = None
+        if self.output is not None:
+            self.output.all_off()
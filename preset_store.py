@@ -0,0 +1,327 @@
+# preset_store.py
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+from kit import get_kit
+from presets import from_entry
+from sequencer import Pattern
+from similarity import grid_hash, canonical_hash, nearest
+
+STORE_FILE = "presets.db"
+# Bumped when canonical_hash changes; older stores are rehashed on open
+CANONICAL_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS presets (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    steps INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    bpm INTEGER,
+    tags TEXT NOT NULL DEFAULT '',
+    density REAL NOT NULL,
+    grid BLOB NOT NULL,
+    hash TEXT,
+    canonical TEXT,
+    velocity BLOB,
+    offset BLOB,
+    swing REAL NOT NULL DEFAULT 0,
+    kit TEXT NOT NULL DEFAULT 'default'
+);
+CREATE INDEX IF NOT EXISTS presets_steps ON presets(steps);
+CREATE INDEX IF NOT EXISTS presets_density ON presets(density);
+"""
+
+HASH_INDEXES = """
+CREATE INDEX IF NOT EXISTS presets_hash ON presets(hash);
+CREATE INDEX IF NOT EXISTS presets_canonical ON presets(canonical);
+"""
+
+INSERT = (
+    "INSERT INTO presets (name, steps, rows, bpm, tags, density, grid, hash, canonical, "
+    "velocity, offset, swing, kit) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _tags(tags):
+    # Stored as ",a,b," so a single tag can be matched with LIKE '%,a,%'
+    return "," + ",".join(tags) + "," if tags else ""
+
+
+def _groove(pattern):
+    # Raw uint8/int8 bytes, NULL when the pattern uses the defaults
+    velocity, offset = pattern.velocity, pattern.offset
+    return (None if velocity is None else velocity.tobytes(),
+            None if offset is None else offset.tobytes(),
+            pattern.swing)
+
+
+def _row(pattern, bpm, tags, name):
+    grid = pattern.grid
+    density = float(grid.mean()) if grid.size else 0.0
+    return (name, pattern.steps, pattern.rows, bpm, _tags(tags), density, pattern.pack(),
+            grid_hash(pattern), canonical_hash(pattern)) + _groove(pattern) + (pattern.kit.name,)
+
+
+class LazyPatterns:
+    """Sequence of stored presets that loads each one on first access.
+
+    Loaded patterns are kept, so edits to them survive until they are
+    written back with PresetStore.save.
+    """
+
+    def __init__(self, store, ids):
+        self.store = store
+        self.ids = list(ids)
+        self.loaded = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self.ids)
+        pattern = self.loaded.get(index)
+        if pattern is None:
+            pattern = self.store.get(self.ids[index])
+            self.loaded[index] = pattern
+        return pattern
+
+    def __setitem__(self, index, pattern):
+        if index < 0:
+            index += len(self.ids)
+        self.loaded[index] = pattern
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self[i]
+
+
+class PresetStore:
+    """Preset library in a single indexed SQLite file.
+
+    Grids are stored bit-packed next to their metadata (steps, BPM, tags,
+    density). Listing and filtering only touch the index columns; a
+    pattern is unpacked only when it is fetched. Velocity and offset
+    arrays are stored as raw bytes, and only for presets that have them.
+
+    Every preset also carries a content hash and a rotation-invariant
+    hash for duplicate checks. Nearest-neighbour queries run over a packed
+    matrix of all grids of the same shape, built once and dropped on
+    writes.
+    """
+
+    def __init__(self, filename=STORE_FILE):
+        self.filename = filename
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.executescript(HASH_INDEXES)
+        self._packed = {}  # (rows, steps) -> (ids, packed grid matrix)
+
+    def _migrate(self):
+        columns = {r[1] for r in self.conn.execute("PRAGMA table_info(presets)")}
+        if "kit" not in columns:
+            # Stores created before kits; every preset used the default kit
+            with self.conn:
+                self.conn.execute("ALTER TABLE presets ADD COLUMN kit TEXT NOT NULL DEFAULT 'default'")
+        if "swing" not in columns:
+            # Stores created before grooves were stored
+            with self.conn:
+                self.conn.execute("ALTER TABLE presets ADD COLUMN velocity BLOB")
+                self.conn.execute("ALTER TABLE presets ADD COLUMN offset BLOB")
+                self.conn.execute("ALTER TABLE presets ADD COLUMN swing REAL NOT NULL DEFAULT 0")
+        # Stores created before content hashing lack the hash columns, and
+        # stores before version 1 hold canonical hashes of the old scheme
+        if "hash" in columns and self.conn.execute("PRAGMA user_version").fetchone()[0] >= CANONICAL_VERSION:
+            return
+        with self.conn:
+            if "hash" not in columns:
+                self.conn.execute("ALTER TABLE presets ADD COLUMN hash TEXT")
+                self.conn.execute("ALTER TABLE presets ADD COLUMN canonical TEXT")
+            rows = self.conn.execute("SELECT id, steps, rows, grid FROM presets")
+            for preset_id, steps, n_rows, grid in rows.fetchall():
+                pattern = Pattern.unpack(grid, steps, n_rows)
+                self.conn.execute(
+                    "UPDATE presets SET hash = ?, canonical = ? WHERE id = ?",
+                    (grid_hash(pattern), canonical_hash(pattern), preset_id),
+                )
+            self.conn.execute(f"PRAGMA user_version = {CANONICAL_VERSION}")
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM presets").fetchone()[0]
+
+    def add(self, pattern, bpm=None, tags=(), name=None, dedupe=None):
+        return self.add_many([(pattern, {"bpm": bpm, "tags": tags, "name": name})], dedupe)[0]
+
+    def add_many(self, entries, dedupe=None):
+        """Insert (pattern, meta) pairs in one transaction and return their ids.
+
+        `entries` may be a generator; meta keys are bpm, tags and name.
+        With dedupe="exact" (or "rotation") a pattern whose hash (or
+        rotation-invariant hash) is already stored is skipped and its id
+        is returned as None.
+        """
+        column = {None: None, "exact": "hash", "rotation": "canonical"}[dedupe]
+        ids = []
+        with self.conn:
+            for pattern, meta in entries:
+                row = _row(pattern, meta.get("bpm"), meta.get("tags", ()), meta.get("name"))
+                if column and self._exists(column, row[7] if column == "hash" else row[8]):
+                    ids.append(None)
+                    continue
+                ids.append(self.conn.execute(INSERT, row).lastrowid)
+        self._packed.clear()
+        return ids
+
+    def _exists(self, column, value):
+        return self.conn.execute(
+            f"SELECT 1 FROM presets WHERE {column} = ? LIMIT 1", (value,)
+        ).fetchone() is not None
+
+    def update(self, preset_id, pattern):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE presets SET steps = ?, rows = ?, density = ?, grid = ?, hash = ?, canonical = ?, "
+                "velocity = ?, offset = ?, swing = ?, kit = ? WHERE id = ?",
+                (pattern.steps, pattern.rows, float(pattern.grid.mean()), pattern.pack(),
+                 grid_hash(pattern), canonical_hash(pattern)) + _groove(pattern)
+                + (pattern.kit.name, preset_id),
+            )
+        self._packed.clear()
+
+    def delete(self, preset_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM presets WHERE id = ?", (preset_id,))
+        self._packed.clear()
+
+    def find(self, pattern, ignore_rotation=False):
+        """Return the ids of stored presets identical to `pattern`."""
+        if ignore_rotation:
+            column, value = "canonical", canonical_hash(pattern)
+        else:
+            column, value = "hash", grid_hash(pattern)
+        return [r[0] for r in self.conn.execute(
+            f"SELECT id FROM presets WHERE {column} = ? ORDER BY id", (value,)
+        )]
+
+    def _packed_grids(self, rows, steps):
+        key = (rows, steps)
+        if key not in self._packed:
+            result = self.conn.execute(
+                "SELECT id, grid FROM presets WHERE rows = ? AND steps = ? ORDER BY id", (rows, steps)
+            ).fetchall()
+            ids = np.array([r[0] for r in result], dtype=np.int64)
+            width = rows * ((steps + 7) // 8)
+            packed = np.frombuffer(b"".join(r[1] for r in result), dtype=np.uint8).reshape(len(ids), width)
+            self._packed[key] = (ids, packed)
+        return self._packed[key]
+
+    def nearest(self, pattern, k=10):
+        """Return up to k (id, distance) pairs closest to `pattern` by Hamming distance.
+
+        Only presets with the same number of rows and steps are compared.
+        """
+        ids, packed = self._packed_grids(pattern.rows, pattern.steps)
+        idx, distances = nearest(pattern.pack(), packed, k)
+        return list(zip(ids[idx].tolist(), distances.tolist()))
+
+    def get(self, preset_id):
+        row = self.conn.execute(
+            "SELECT steps, rows, grid, velocity, offset, swing, kit FROM presets WHERE id = ?", (preset_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(preset_id)
+        steps, rows, grid, velocity, offset, swing, kit = row
+        pattern = Pattern.unpack(grid, steps, rows, get_kit(kit, rows))
+        if velocity is not None:
+            pattern.velocity = np.frombuffer(velocity, dtype=np.uint8).reshape(rows, steps)
+        if offset is not None:
+            pattern.offset = np.frombuffer(offset, dtype=np.int8).reshape(rows, steps)
+        if swing:
+            pattern.swing = swing
+        return pattern
+
+    def info(self, preset_id):
+        row = self.conn.execute(
+            "SELECT id, name, steps, rows, bpm, tags, density FROM presets WHERE id = ?", (preset_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(preset_id)
+        keys = ("id", "name", "steps", "rows", "bpm", "tags", "density")
+        info = dict(zip(keys, row))
+        info["tags"] = [t for t in info["tags"].split(",") if t]
+        return info
+
+    def ids(self, steps=None, tag=None, min_density=None, max_density=None):
+        """Return preset ids matching the filters, in insertion order."""
+        query = "SELECT id FROM presets"
+        where, args = [], []
+        if steps is not None:
+            where.append("steps = ?")
+            args.append(steps)
+        if tag is not None:
+            where.append("tags LIKE ?")
+            args.append(f"%,{tag},%")
+        if min_density is not None:
+            where.append("density >= ?")
+            args.append(min_density)
+        if max_density is not None:
+            where.append("density <= ?")
+            args.append(max_density)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        return [r[0] for r in self.conn.execute(query + " ORDER BY id", args)]
+
+    def patterns(self, **filters):
+        """Return a LazyPatterns sequence over the matching presets."""
+        return LazyPatterns(self, self.ids(**filters))
+
+    def save(self, patterns):
+        """Write patterns back and return them as a LazyPatterns bound to this store.
+
+        Presets that came from this store are updated in place (only the
+        ones that were loaded); any other patterns are added.
+        """
+        if isinstance(patterns, LazyPatterns) and patterns.store is self:
+            with self.conn:
+                for index, pattern in list(patterns.loaded.items()):
+                    self.update(patterns.ids[index], pattern)
+            return patterns
+        patterns = list(patterns)
+        saved = LazyPatterns(self, self.add_many((p, {}) for p in patterns))
+        saved.loaded = dict(enumerate(patterns))
+        return saved
+
+    def import_json(self, filename="presets.json"):
+        """Copy presets from the legacy JSON file; returns the number imported."""
+        with open(filename, "r") as f:
+            data = json.load(f)
+        entries = []
+        for p in data:
+            entries.append((from_entry(p), {"bpm": p.get("bpm"), "name": p.get("source")}))
+        self.add_many(entries)
+        return len(entries)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_store(filename=STORE_FILE, legacy_file="presets.json"):
+    """Open the preset store, importing the legacy JSON presets on first use."""
+    is_new = not os.path.exists(filename)
+    store = PresetStore(filename)
+    if is_new and legacy_file and os.path.exists(legacy_file):
+        store.import_json(legacy_file)
+    return store
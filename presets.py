@@ -2,13 +2,36 @@
 import json
 import os
 
+def to_entry(pattern):
+    """JSON entry for a pattern; groove keys are only written when set."""
+    entry = {"steps": pattern.steps, "rows": pattern.to_text()}
+    if pattern.kit.name != "default":
+        entry["kit"] = pattern.kit.name
+    if pattern.velocity is not None:
+        entry["velocity"] = pattern.velocity.tolist()
+    if pattern.offset is not None:
+        entry["offset"] = pattern.offset.tolist()
+    if pattern.swing:
+        entry["swing"] = pattern.swing
+    return entry
+
+def from_entry(entry):
+    from kit import get_kit
+    from sequencer import Pattern
+    pat = Pattern(entry["steps"], get_kit(entry.get("kit"), len(entry["rows"])))
+    pat.from_text(entry["rows"])
+    if "velocity" in entry:
+        pat.velocity = entry["velocity"]
+    if "offset" in entry:
+        pat.offset = entry["offset"]
+    if "swing" in entry:
+        pat.swing = entry["swing"]
+    return pat
+
 def save_presets(patterns, filename="presets.json"):
     data = []
     for p in patterns:
-        data.append({
-            "steps": p.steps,
-            "rows": p.to_text()
-        })
+        data.append(to_entry(p))
     with open(filename, "w") as f:
         json.dump(data, f, indent=4)
 
@@ -19,12 +42,39 @@ def load_presets(filename="presets.json"):
     with open(filename, "r") as f:
         data = json.load(f)
 
-    from sequencer import Pattern
     patterns = []
 
     for p in data:
-        pat = Pattern(p["steps"])
-        pat.from_text(p["rows"])
-        patterns.append(pat)
+        patterns.append(from_entry(p))
 
     return patterns
+
+
+class PresetWriter:
+    """Streams patterns into a presets file without holding them in memory.
+
+    The output is the same JSON array `load_presets` reads; entries may
+    carry extra metadata such as the source BPM and file.
+    """
+
+    def __init__(self, filename="presets.json"):
+        self.f = open(filename, "w")
+        self.f.write("[")
+        self.count = 0
+
+    def add(self, pattern, **meta):
+        entry = to_entry(pattern)
+        entry.update(meta)
+        self.f.write(",\n" if self.count else "\n")
+        self.f.write(json.dumps(entry))
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]\n")
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,114 @@
+# sample_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from wav_io import SAMPLE_RATE, CHANNELS, decode_wav
+
+DEFAULT_BUDGET = 256 * 1024 * 1024  # bytes of decoded audio
+
+# How often (seconds) a cached path is re-checked for changes on disk
+CHECK_INTERVAL = 1.0
+
+
+class SampleCache:
+    """Shared cache of decoded WAV samples with a byte budget.
+
+    Entries are keyed by path and modification time, so an edited file is
+    decoded again while unchanged ones never touch the disk. A path is
+    stat()ed at most once per CHECK_INTERVAL, which keeps lookups on the
+    audio path to a dictionary hit. The least recently used buffers are
+    evicted once the decoded size exceeds `max_bytes`. Returned buffers
+    are read-only and may be shared between engines.
+
+    `get` may stat and decode, so it belongs on a loader thread. The
+    audio path uses `peek`, a lock-free read of the buffer `get` last
+    returned for a path, which never touches the disk.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET, check_interval=CHECK_INTERVAL, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.clock = clock
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> buffer
+        self._latest = {}  # (path, rate, channels) -> (key, last checked)
+        self._staged = {}  # (path, rate, channels) -> buffer, read without the lock
+        self._lock = threading.Lock()
+
+    def get(self, path, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        """Return the decoded float32 (frames, channels) buffer for `path`."""
+        path = os.path.abspath(path)
+        ident = (path, sample_rate, channels)
+        now = self.clock()
+
+        with self._lock:
+            latest = self._latest.get(ident)
+            if latest is not None and now - latest[1] < self.check_interval:
+                buf = self._entries.get(latest[0])
+                if buf is not None:
+                    self._entries.move_to_end(latest[0])
+                    self._staged[ident] = buf
+                    self.hits += 1
+                    return buf
+
+        key = ident + (os.stat(path).st_mtime_ns,)
+        with self._lock:
+            buf = self._entries.get(key)
+            if buf is not None:
+                self._entries.move_to_end(key)
+                self._latest[ident] = (key, now)
+                self._staged[ident] = buf
+                self.hits += 1
+                return buf
+
+        # Decode outside the lock so other lookups are not blocked
+        buf = decode_wav(path, sample_rate, channels)
+        buf.flags.writeable = False
+
+        with self._lock:
+            self.misses += 1
+            stale = self._latest.get(ident)
+            if stale is not None and stale[0] in self._entries:
+                self.bytes -= self._entries.pop(stale[0]).nbytes
+            if key not in self._entries:
+                self._entries[key] = buf
+                self.bytes += buf.nbytes
+            self._latest[ident] = (key, now)
+            self._staged[ident] = self._entries[key]
+            self._evict()
+            return self._entries.get(key, buf)
+
+    def peek(self, path, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        """Return the buffer `get` last returned for `path`, or None; never blocks or stats.
+
+        A single dictionary read, safe from the audio callback or timing
+        thread while a loader thread calls `get`.
+        """
+        return self._staged.get((os.path.abspath(path), sample_rate, channels))
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            key, buf = self._entries.popitem(last=False)
+            self.bytes -= buf.nbytes
+            if self._staged.get(key[:3]) is buf:
+                del self._staged[key[:3]]
+
+    def set_budget(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+            self._staged = {}
+            self.bytes = 0
+
+
+default_cache = SampleCache()
@@ -0,0 +1,91 @@
+# scheduler.py
+import time
+
+from timing_stats import HISTORY, TimingRecorder
+
+
+class StepScheduler:
+    """Drift-free step clock.
+
+    Every step's deadline is computed from a single monotonic start time
+    (start + n * step_time) instead of sleeping a fixed amount after each
+    step, so sleep jitter and callback cost never accumulate. Steps are
+    handed to the callback up to `lookahead` seconds before their deadline
+    together with the deadline itself, so backends that can schedule ahead
+    can place the hit exactly. Steps that are more than `max_late` seconds
+    behind are dropped rather than played in a burst, which keeps the
+    tempo locked after a stall. The last `spin` seconds before a deadline
+    are busy-waited because OS sleeps routinely overshoot by a millisecond
+    or more. Every step's timing is kept in `recorder` (a TimingRecorder).
+    `set_step_time` changes the tempo from another thread; it takes effect
+    at the next step, whose deadline stays put while the following ones
+    are spaced anew.
+    """
+
+    def __init__(self, step_time, lookahead=0.0, max_late=None, history=HISTORY,
+                 spin=0.002, clock=time.perf_counter, sleep=time.sleep):
+        self.step_time = step_time
+        self.requested_step_time = step_time
+        self.lookahead = lookahead
+        self.spin = spin
+        self.follow_tempo = max_late is None  # max_late stays one step
+        self.max_late = step_time if max_late is None else max_late
+        self.clock = clock
+        self.sleep = sleep
+        self.start_time = None
+        self.step = 0
+        self.dropped = 0
+        self.recorder = TimingRecorder(history)
+
+    def deadline(self, step):
+        return self.start_time + step * self.step_time
+
+    def set_step_time(self, step_time):
+        """Change the tempo at the next step (a plain attribute write, safe while running)."""
+        self.requested_step_time = step_time
+
+    def run(self, callback, running):
+        """Call callback(step, deadline) for each step while running() is true."""
+        # Step 0 is due one lookahead from now, so its hand-over target is
+        # "now" and the first step is not recorded as late by the lookahead
+        self.start_time = self.clock() + self.lookahead
+        self.step = 0
+        self.dropped = 0
+        self.recorder.clear()
+
+        while running():
+            requested = self.requested_step_time
+            if requested != self.step_time:
+                self.start_time = self.deadline(self.step) - self.step * requested
+                self.step_time = requested
+                if self.follow_tempo:
+                    self.max_late = requested
+            deadline = self.deadline(self.step)
+            target = deadline - self.lookahead
+            wait = target - self.clock()
+            if wait > self.spin:
+                self.sleep(wait - self.spin)
+                if not running():
+                    break
+            while self.clock() < target:
+                pass
+
+            late = self.clock() - deadline
+            if late > self.max_late:
+                # Fell behind (system stall); skip to the next step that is
+                # still in the future instead of firing everything at once
+                skip = int(late // self.step_time) + 1
+                self.dropped += skip
+                self.recorder.record_drop(skip)
+                self.step += skip
+                continue
+
+            fired = self.clock()
+            callback(self.step, deadline)
+            self.recorder.record(self.step, target, fired, self.clock() - fired)
+            self.step += 1
+
+    def stats(self):
+        """Return (mean, max) lateness in seconds over the recorded history."""
+        stats = self.recorder.jitter()
+        return stats["mean"], stats["max"]
@@ -1,109 +1,449 @@
 # sequencer.py
-import random
-import math
+import numpy as np
+
+from euclidean import euclidean
+from kit import DEFAULT_KIT, get_kit
 
 NOTE_KICK = 36
 NOTE_SNARE = 38
 NOTE_HH = 42
 
-NOTE_MAP = {
-    "k": NOTE_KICK,
-    "s": NOTE_SNARE,
-    "h": NOTE_HH
-}
+# Row layout of the default kit; other kits are described in kit.py
+NOTE_MAP = dict(zip(DEFAULT_KIT.chars, DEFAULT_KIT.notes.tolist()))
+ROW_CHARS = DEFAULT_KIT.chars
+ROW_NOTES = DEFAULT_KIT.notes
+
+# Per-row hit probabilities (kick, snare, hat)
+RANDOM_PROBS = tuple(DEFAULT_KIT.random_probs)
+FILL_PROBS = tuple(DEFAULT_KIT.fill_probs)
+
+# Patterns generated per chunk, bounds the temporary float buffer
+BATCH_CHUNK = 65536
+
+# Groove: per-hit MIDI velocity, and timing offsets in STEP_TICKS per step
+# (ticks of a 16th note at 480 PPQ). Offsets stay within half a step of
+# the grid; swing delays every odd step by up to half a step.
+DEFAULT_VELOCITY = 100
+STEP_TICKS = 120
+MIN_OFFSET = -(STEP_TICKS // 2)
+MAX_OFFSET = STEP_TICKS // 2 - 1
+MAX_SWING = 0.5
+
+_rng = np.random.default_rng()
+
+
+def _row_probs(probs):
+    probs = np.asarray(probs, dtype=float)
+    # A 1D vector is per row; a 2D array may give one probability per cell
+    return probs[:, None] if probs.ndim == 1 else probs
+
+
+def generate_batch(n, probs=RANDOM_PROBS, steps=16, seed=None, rng=None):
+    """Generate n patterns at once as an (n, rows, steps) bool array.
+
+    `probs` holds one hit probability per row (or a (rows, steps) array of
+    per-cell probabilities). Pass `seed` or a NumPy Generator for
+    reproducible batches. Wrap the result with `iter_patterns` to get
+    Pattern objects.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    probs = _row_probs(probs)
+    grids = np.empty((n, probs.shape[0], steps), dtype=bool)
+    for start in range(0, n, BATCH_CHUNK):
+        chunk = grids[start:start + BATCH_CHUNK]
+        np.less(rng.random(chunk.shape), probs, out=chunk)
+    return grids
+
+
+def iter_patterns(grids, kit=None):
+    """Lazily wrap each grid of a stacked batch in a Pattern (no copy)."""
+    for grid in grids:
+        yield Pattern.from_array(grid, kit=kit)
+
+
+def _readonly(array):
+    if array is None:
+        return None
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
 
 class Pattern:
-    def __init__(self, steps=16):
-        self.steps = steps
-        self.grid = [[False] * steps for _ in range(3)]  # Kick, Snare, Hat
+    """Drum pattern stored as a (rows, steps) NumPy bool array.
+
+    Rows follow the pattern's `kit` (kit.py), which gives each row its
+    note, text character and generator probabilities; the default kit
+    has the original kick, snare and hi-hat rows.
+
+    `grid[row][col]` reads work as before, but `grid` (like `velocity`
+    and `offset`) is a read-only view, so an in-place write raises
+    instead of leaving cached event tables stale. Change cells with
+    `toggle`, `set_hit` or `set_cells`, or assign a whole array (a
+    nested list is converted). Bulk operations (shift, invert, &, |, ^,
+    density) work on whole arrays and return new patterns.
+
+    Groove data is optional and array-backed like the grid: `velocity`
+    (uint8) and `offset` (int8 ticks, see STEP_TICKS) are (rows, steps)
+    arrays allocated only once a hit deviates from the defaults, so plain
+    patterns cost nothing extra. `swing` delays the odd steps by a
+    fraction of a step. Bulk grid operations other than `shift` return
+    patterns without groove data.
+
+    Every mutating method bumps `version`. The step-indexed event table
+    from `step_events` is cached together with the version it was built
+    from and published as one tuple, so a playback thread can read it
+    while another thread edits without any lock: a stale table is simply
+    rebuilt on the next read. The grid, velocity and offset arrays
+    are held in one tuple that is replaced as a whole, so a reader never
+    pairs a resized grid with groove arrays of the old shape.
+    """
+
+    __slots__ = ("_state", "_kit", "_swing", "_events", "_hits", "_version")
+
+    def __init__(self, steps=16, kit=None):
+        self._kit = kit or DEFAULT_KIT
+        # (grid, velocity, offset); velocity None = DEFAULT_VELOCITY
+        # everywhere, offset None = on the grid
+        self._state = (np.zeros((len(self._kit), steps), dtype=bool), None, None)
+        self._swing = 0.0
+        self._events = None  # (version, table)
+        self._hits = None  # (version, table)
+        self._version = 0
+
+    @classmethod
+    def from_array(cls, grid, velocity=None, offset=None, swing=0.0, kit=None):
+        """Wrap a (rows, steps) array without copying it.
+
+        Without a kit, one with a matching number of rows is picked.
+        """
+        pattern = cls.__new__(cls)
+        grid = np.asarray(grid, dtype=bool)
+        if not grid.flags.writeable:
+            # e.g. another pattern's read-only `grid`
+            grid = grid.copy()
+        pattern._state = (grid, None, None)
+        pattern._kit = kit or get_kit(rows=pattern._grid.shape[0])
+        if len(pattern._kit) != pattern._grid.shape[0]:
+            raise ValueError(f"{pattern._kit!r} does not fit a grid with {pattern._grid.shape[0]} rows")
+        pattern._swing = 0.0
+        pattern._events = None
+        pattern._hits = None
+        pattern._version = 0
+        if velocity is not None:
+            pattern.velocity = velocity
+        if offset is not None:
+            pattern.offset = offset
+        if swing:
+            pattern.swing = swing
+        return pattern
+
+    @property
+    def _grid(self):
+        return self._state[0]
+
+    @property
+    def _velocity(self):
+        return self._state[1]
+
+    @property
+    def _offset(self):
+        return self._state[2]
+
+    @property
+    def grid(self):
+        return _readonly(self._grid)
+
+    @grid.setter
+    def grid(self, value):
+        value = np.array(value, dtype=bool)
+        if value.ndim != 2:
+            raise ValueError("grid must be a 2D (rows, steps) array")
+        if value.shape[0] != len(self._kit):
+            self._kit = get_kit(rows=value.shape[0])
+        if value.shape != self._grid.shape:
+            self._state = (value, None, None)
+        else:
+            self._state = (value, self._velocity, self._offset)
+        self._version += 1
+
+    def _groove_array(self, value, dtype, low, high):
+        value = np.clip(np.asarray(value), low, high).astype(dtype)
+        if value.shape != self._grid.shape:
+            raise ValueError(f"groove array must have shape {self._grid.shape}")
+        return value
+
+    @property
+    def velocity(self):
+        """(rows, steps) uint8 velocities, or None if every hit uses DEFAULT_VELOCITY."""
+        return _readonly(self._velocity)
+
+    @velocity.setter
+    def velocity(self, value):
+        velocity = None if value is None else self._groove_array(value, np.uint8, 1, 127)
+        self._state = (self._grid, velocity, self._offset)
+        self._version += 1
+
+    @property
+    def offset(self):
+        """(rows, steps) int8 timing offsets in STEP_TICKS per step, or None if on the grid."""
+        return _readonly(self._offset)
+
+    @offset.setter
+    def offset(self, value):
+        offset = None if value is None else self._groove_array(value, np.int8, MIN_OFFSET, MAX_OFFSET)
+        self._state = (self._grid, self._velocity, offset)
+        self._version += 1
+
+    @property
+    def swing(self):
+        """Delay of every odd step as a fraction of a step (0 = straight)."""
+        return self._swing
+
+    @swing.setter
+    def swing(self, value):
+        self._swing = min(max(float(value), 0.0), MAX_SWING)
+        self._version += 1
 
-    # Convert pattern to text rows (k s h or .)
+    def has_groove(self):
+        return self._velocity is not None or self._offset is not None or self._swing != 0.0
+
+    def set_hit(self, row, col, velocity=None, offset=None):
+        """Turn a step on, optionally with its own velocity and tick offset."""
+        grid, velocities, offsets = self._state
+        grid[row, col] = True
+        if velocity is not None:
+            if velocities is None:
+                velocities = np.full(grid.shape, DEFAULT_VELOCITY, dtype=np.uint8)
+            velocities[row, col] = min(max(int(velocity), 1), 127)
+        if offset is not None:
+            if offsets is None:
+                offsets = np.zeros(grid.shape, dtype=np.int8)
+            offsets[row, col] = min(max(int(offset), MIN_OFFSET), MAX_OFFSET)
+        self._state = (grid, velocities, offsets)
+        self._version += 1
+
+    def _reset_groove(self, index):
+        # Back to the defaults for the given cells
+        if self._velocity is not None:
+            self._velocity[index] = DEFAULT_VELOCITY
+        if self._offset is not None:
+            self._offset[index] = 0
+
+    @property
+    def steps(self):
+        return self._grid.shape[1]
+
+    @steps.setter
+    def steps(self, steps):
+        self.resize(steps)
+
+    @property
+    def rows(self):
+        return self._grid.shape[0]
+
+    @property
+    def kit(self):
+        return self._kit
+
+    def with_kit(self, kit):
+        """Copy of the pattern on another kit, matching rows by note.
+
+        Rows whose note (or an alias of it) the new kit lacks are dropped.
+        """
+        target = kit.row_for_note[self._kit.notes]
+        keep = np.nonzero(target >= 0)[0]
+        rows = target[keep]
+        grid = np.zeros((len(kit), self.steps), dtype=bool)
+        np.logical_or.at(grid, rows, self._grid[keep])
+        pattern = Pattern.from_array(grid, swing=self._swing, kit=kit)
+        groove = []
+        for array, fill in ((self._velocity, DEFAULT_VELOCITY), (self._offset, 0)):
+            if array is not None:
+                mapped = np.full(grid.shape, fill, dtype=array.dtype)
+                mapped[rows] = array[keep]
+                array = mapped
+            groove.append(array)
+        pattern._state = (grid, *groove)
+        return pattern
+
+    def resize(self, steps):
+        """Change the step count, keeping hits that still fit."""
+        keep = min(steps, self.steps)
+        resized = []
+        for array, fill in zip(self._state, (False, DEFAULT_VELOCITY, 0)):
+            if array is not None:
+                new = np.full((self.rows, steps), fill, dtype=array.dtype)
+                new[:, :keep] = array[:, :keep]
+                array = new
+            resized.append(array)
+        self._state = tuple(resized)
+        self._version += 1
+
+    def clear(self):
+        self._state = (np.zeros_like(self._grid), None, None)
+        self._version += 1
+
+    def set_cells(self, rows, cols, value=True):
+        """Set many cells at once (rows and cols are index arrays)."""
+        self._grid[rows, cols] = value
+        self._version += 1
+
+    def invalidate(self):
+        """Drop cached event tables (e.g. after swapping the kit's samples)."""
+        self._version += 1
+
+    @property
+    def version(self):
+        return self._version
+
+    def copy(self):
+        pattern = Pattern.from_array(self._grid.copy(), kit=self._kit)
+        pattern._state = tuple(None if a is None else a.copy() for a in self._state)
+        pattern._swing = self._swing
+        return pattern
+
+    # Compact storage: one bit per cell
+    def pack(self):
+        return np.packbits(self._grid, axis=1).tobytes()
+
+    @classmethod
+    def unpack(cls, data, steps, rows=3, kit=None):
+        packed = np.frombuffer(data, dtype=np.uint8).reshape(rows, -1)
+        return cls.from_array(np.unpackbits(packed, axis=1, count=steps).astype(bool), kit=kit)
+
+    # Convert pattern to text rows (the kit's row characters or .)
     def to_text(self):
-        rows = []
-        for r in range(3):
-            row = ""
-            for c in range(self.steps):
-                row += "ksh"[r] if self.grid[r][c] else "."
-            rows.append(row)
-        return rows
-
-    # Load pattern from text
+        chars = np.array(list(self._kit.chars))[:, None]
+        cells = np.where(self._grid, chars, ".")
+        return ["".join(row) for row in cells]
+
+    # Load pattern from text; cells past the end of a text row keep their value
     def from_text(self, text_rows):
-        for r, row in enumerate(text_rows):
-            for c, ch in enumerate(row[:self.steps]):
-                self.grid[r][c] = (
-                    ch.lower() in ["k", "s", "h"] and "ksh".index(ch.lower()) == r
-                )
+        text_rows = [row[:self.steps].lower() for row in text_rows[:self.rows]]
+        n = len(text_rows)
+        if n:
+            data = "".join(row.ljust(self.steps, ".") for row in text_rows).encode("latin-1", "replace")
+            cells = np.frombuffer(data, dtype=np.uint8).reshape(n, self.steps)
+            given = np.arange(self.steps) < np.array([len(row) for row in text_rows])[:, None]
+            hits = cells == self._kit.char_codes[:n, None]
+            self._grid[:n] = np.where(given, hits, self._grid[:n])
+        self._version += 1
 
     # Toggle a step
     def toggle(self, row, col):
-        self.grid[row][col] = not self.grid[row][col]
-
-    # Random pattern (25% chance per step)
-    def generate_random(self):
-        for r in range(3):
-            for c in range(self.steps):
-                self.grid[r][c] = (random.random() < 0.25)
-
-    # "Fill" pattern (snare 50%, others 30%)
-    def generate_fill(self):
-        for r in range(3):
-            for c in range(self.steps):
-                self.grid[r][c] = (random.random() < (0.5 if r == 1 else 0.3))
-
-    def generate_euclidean(self, pulses, total, row):
-        """Generate Euclidean rhythm using the Bjorklund algorithm."""
-        # Safety edge cases
-        if pulses <= 0:
-            self.grid[row] = [False] * total
-            return
-        if pulses >= total:
-            self.grid[row] = [True] * total
-            return
-
-        # Step 1: initialization
-        counts = []
-        remainders = [pulses]
-        divisor = total - pulses
-        level = 0
-
-        # Step 2: compute counts/remainders
-        while True:
-            counts.append(divisor // remainders[level])
-            remainders.append(divisor % remainders[level])
-            divisor = remainders[level]
-            level += 1
-            if remainders[level] == 0:
-                break
-
-        # Step 3: recursion build
-        def build(lv):
-            if lv < 0:
-                return []
-            seq = []
-            for _ in range(counts[lv]):
-                seq.extend(build(lv - 1))
-            if remainders[lv] != 0:
-                seq.extend(build(lv - 2))
-            return seq
-
-        # Ensure we're not going out of bounds with the build process
-        pattern = build(level - 1)  # Adjust level to match counts index
-
-        # Normalize to exact length
-        pattern = pattern[:total]
-        while len(pattern) < total:
-            pattern.append(0)
-
-        # Apply pattern to grid (1 = hit)
-        for c in range(total):
-            self.grid[row][c] = (pattern[c] == 1)
-
-    # Return list of (note, step)
+        self._grid[row, col] = not self._grid[row, col]
+        if self._grid[row, col]:
+            self._reset_groove((row, col))
+        self._version += 1
+
+    # Random pattern (the kit's per-row chances, 25% on the default kit)
+    def generate_random(self, rng=None):
+        self._state = (generate_batch(1, self._kit.random_probs, self.steps, rng=rng or _rng)[0], None, None)
+        self._version += 1
+
+    # "Fill" pattern (default kit: snare 50%, others 30%)
+    def generate_fill(self, rng=None):
+        self._state = (generate_batch(1, self._kit.fill_probs, self.steps, rng=rng or _rng)[0], None, None)
+        self._version += 1
+
+    def generate_euclidean(self, pulses, total, row, rotation=0):
+        """Generate a Euclidean rhythm of `total` steps into `row`."""
+        hits = euclidean(pulses, total, rotation)[:self.steps]
+        self._grid[row] = False
+        self._grid[row, :len(hits)] = hits
+        self._reset_groove(row)
+        self._version += 1
+
+    def step_events(self):
+        """Return a tuple with one tuple of notes per step (cached)."""
+        # Read the version before the grid: a table built from a newer grid
+        # is then tagged too old and rebuilt, never the other way round
+        version = self._version
+        events = self._events
+        if events is None or events[0] != version:
+            grid = self._grid
+            cols, rows = np.nonzero(grid.T)
+            notes = self._kit.notes[rows].tolist()
+            bounds = np.searchsorted(cols, np.arange(grid.shape[1] + 1)).tolist()
+            table = tuple(
+                tuple(notes[bounds[c]:bounds[c + 1]]) for c in range(grid.shape[1])
+            )
+            events = (version, table)
+            self._events = events
+        return events[1]
+
+    # Return list of (note, step), ordered by step
     def get_events(self):
-        events = []
-        for r, note in enumerate([NOTE_KICK, NOTE_SNARE, NOTE_HH]):
-            for c in range(self.steps):
-                if self.grid[r][c]:
-                    events.append((note, c))
-        return events
+        return [
+            (note, c) for c, notes in enumerate(self.step_events()) for note in notes
+        ]
+
+    def hits(self):
+        """Return (notes, steps, velocities, delays) arrays for every hit, in step order.
+
+        `delays` are in steps: the hit's tick offset plus swing on odd steps.
+        """
+        return self._hit_arrays(self._state)
+
+    def _hit_arrays(self, state):
+        # One snapshot of (grid, velocity, offset), so the arrays agree in shape
+        grid, velocity, offset = state
+        cols, rows = np.nonzero(grid.T)
+        notes = self._kit.notes[rows]
+        if velocity is None:
+            velocities = np.full(len(cols), DEFAULT_VELOCITY, dtype=np.uint8)
+        else:
+            velocities = velocity[rows, cols]
+        delays = (cols & 1) * self._swing
+        if offset is not None:
+            delays = delays + offset[rows, cols] / STEP_TICKS
+        return notes, cols, velocities, delays
+
+    def step_hits(self):
+        """Like step_events, but with (note, velocity, delay) per hit (cached)."""
+        version = self._version
+        hits = self._hits
+        if hits is None or hits[0] != version:
+            state = self._state
+            steps = state[0].shape[1]
+            notes, cols, velocities, delays = self._hit_arrays(state)
+            triples = list(zip(notes.tolist(), velocities.tolist(), delays.tolist()))
+            bounds = np.searchsorted(cols, np.arange(steps + 1)).tolist()
+            table = tuple(
+                tuple(triples[bounds[c]:bounds[c + 1]]) for c in range(steps)
+            )
+            hits = (version, table)
+            self._hits = hits
+        return hits[1]
+
+    # Bulk operations
+    def shift(self, n):
+        """Rotate every row (and its groove) by n steps (positive = later)."""
+        return Pattern.from_array(
+            np.roll(self._grid, n, axis=1),
+            None if self._velocity is None else np.roll(self._velocity, n, axis=1),
+            None if self._offset is None else np.roll(self._offset, n, axis=1),
+            self._swing,
+            self._kit,
+        )
+
+    def invert(self):
+        return Pattern.from_array(~self._grid, kit=self._kit)
+
+    def density(self):
+        """Number of hits per row."""
+        return self._grid.sum(axis=1)
+
+    def __invert__(self):
+        return self.invert()
+
+    def __and__(self, other):
+        return Pattern.from_array(self._grid & other.grid, kit=self._kit)
+
+    def __or__(self, other):
+        return Pattern.from_array(self._grid | other.grid, kit=self._kit)
+
+    def __xor__(self, other):
+        return Pattern.from_array(self._grid ^ other.grid, kit=self._kit)
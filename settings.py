@@ -61,7 +61,7 @@ class SettingsWindow:
     
     def create_sound_selector(self, label, sound_type):
         """Create a dropdown for sound selection"""
-        current_sound = self.parent_app.player.samples.get(self.get_note_for_type(sound_type), "Not set")
+        current_sound = self.parent_app.player.sample_paths().get(self.get_note_for_type(sound_type), "Not set")
         
         options = [ft.dropdown.Option("Default")]
         for file in sorted(self.sound_files.keys()):
@@ -99,13 +99,13 @@ class SettingsWindow:
             note = self.get_note_for_type(sound_type)
             if note in SOUND_MAP:
                 if os.path.exists(SOUND_MAP[note]):
-                    self.parent_app.player.samples[note] = SOUND_MAP[note]
+                    self.parent_app.player.set_sample(note, SOUND_MAP[note])
         else:
             # Use custom sound
             note = self.get_note_for_type(sound_type)
             sound_path = self.sound_files.get(selected_file)
             if sound_path and os.path.exists(sound_path):
-                self.parent_app.player.samples[note] = sound_path
+                self.parent_app.player.set_sample(note, sound_path)
     
     def close_dlg(self, e, dlg):
         dlg.open = False
@@ -7,12 +7,14 @@ SETTINGS_FILE = "app_settings.json"
 # Base dir for resources
 _BASE_DIR = os.path.dirname(__file__)
 
-def save_settings(dark_mode, sound_paths):
+def save_settings(dark_mode, sound_paths, sample_cache_mb=None):
     """Save settings to file"""
     settings = {
         "dark_mode": dark_mode,
         "sound_paths": sound_paths
     }
+    if sample_cache_mb is not None:
+        settings["sample_cache_mb"] = sample_cache_mb
     with open(SETTINGS_FILE, "w") as f:
         json.dump(settings, f, indent=4)
 
@@ -0,0 +1,77 @@
+# similarity.py
+import hashlib
+
+import numpy as np
+
+# Number of set bits for every byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+def _digest(rows, steps, data):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(rows.to_bytes(2, "little") + steps.to_bytes(4, "little"))
+    h.update(data)
+    return h.hexdigest()
+
+
+def grid_hash(pattern):
+    """Content hash of a pattern's grid (shape included)."""
+    return _digest(pattern.rows, pattern.steps, pattern.pack())
+
+
+def _least_rotation(codes):
+    """Start of the lexicographically smallest rotation (Booth's algorithm, O(n))."""
+    s = codes + codes
+    f = [-1] * len(s)
+    k = 0
+    for j in range(1, len(s)):
+        sj = s[j]
+        i = f[j - k - 1]
+        while i != -1 and sj != s[k + i + 1]:
+            if sj < s[k + i + 1]:
+                k = j - i - 1
+            i = f[i]
+        if sj != s[k + i + 1]:  # i == -1
+            if sj < s[k]:
+                k = j
+            f[j - k] = -1
+        else:
+            f[j - k] = i + 1
+    return k % len(codes)
+
+
+def canonical_hash(pattern):
+    """Hash that is identical for every rotation of the same groove.
+
+    All rows are rotated together. Each step's column is ranked by its
+    packed bytes, and the rotation with the smallest sequence of column
+    ranks is hashed, so time and memory stay linear in rows x steps.
+    """
+    grid = pattern.grid
+    steps = pattern.steps
+    if steps == 0:
+        return grid_hash(pattern)
+    columns = np.packbits(grid, axis=0).T
+    _, codes = np.unique(columns, axis=0, return_inverse=True)
+    start = _least_rotation(codes.reshape(-1).tolist())
+    best = np.packbits(np.roll(grid, -start, axis=1), axis=1).tobytes()
+    return _digest(pattern.rows, steps, best)
+
+
+def hamming_distances(query, packed):
+    """Bit distance between one packed grid (bytes) and an (N, nbytes) uint8 matrix."""
+    diff = np.bitwise_xor(packed, np.frombuffer(query, dtype=np.uint8))
+    if hasattr(np, "bitwise_count"):  # NumPy 2.0+
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT[diff].sum(axis=1, dtype=np.int64)
+
+
+def nearest(query, packed, k=10):
+    """Return (indices, distances) of the k rows of `packed` closest to `query`."""
+    distances = hamming_distances(query, packed)
+    k = min(k, len(distances))
+    if k == 0:
+        return np.empty(0, dtype=np.intp), distances[:0]
+    idx = np.argpartition(distances, k - 1)[:k]
+    idx = idx[np.argsort(distances[idx], kind="stable")]
+    return idx, distances[idx]
@@ -0,0 +1,85 @@
+# startup_bench.py
+"""Measure cold import time of the app entry points.
+
+Usage: python startup_bench.py [--runs 5] [--budget-ms 400]
+
+Each module is imported in a fresh interpreter with `python -X importtime`.
+The script prints the median total and the slowest imports, and exits 1
+when a median exceeds its budget or a module that should load lazily
+shows up at startup. test_startup.py runs the lazy-import checks under
+pytest (and the budgets with STARTUP_BUDGET=1).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Entry module -> default budget in milliseconds (cumulative import time)
+BUDGETS = {
+    "gui": 400,
+    "cli": 50,
+}
+
+# Modules that must not be imported until they are used
+LAZY = {
+    "gui": ("mido", "playback", "preset_store", "sqlite3", "midi_export", "settings",
+            "sounddevice", "playsound3", "tkinter", "tasks"),
+    "cli": ("flet", "tkinter", "numpy", "mido", "sqlite3"),
+}
+
+
+def import_times(module):
+    """Return {module name: (self us, cumulative us)} for one cold import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative))
+    return times
+
+
+def bench(module, runs=5):
+    """Return (median total ms, times of the last run)."""
+    totals = []
+    for _ in range(runs):
+        times = import_times(module)
+        totals.append(times[module][1] / 1000.0)
+    return statistics.median(totals), times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app entry points.")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="override every module's budget")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        total, times = bench(module, args.runs)
+        budget = args.budget_ms or BUDGETS.get(module)
+        status = "ok" if budget is None or total <= budget else "OVER BUDGET"
+        print(f"{module}: {total:.1f} ms (budget {budget} ms) {status}")
+        failed |= status != "ok"
+
+        for name in LAZY.get(module, ()):
+            if name in times:
+                print(f"  imported at startup: {name}")
+                failed = True
+
+        slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+        for name, (self_us, cumulative) in slowest:
+            print(f"  {self_us / 1000.0:8.1f} ms self {cumulative / 1000.0:8.1f} ms total  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+# tasks.py
+"""Background jobs for the GUI, so file dialogs and file I/O never block event handlers."""
+import threading
+
+
+class Cancelled(Exception):
+    """Raised inside a job once it has been cancelled."""
+
+
+class Task:
+    """Runs `work(task)` on a worker thread with progress and cancellation.
+
+    The job reports with `task.progress(done, total)` (or calls
+    `task.check()`) between units of work; both raise Cancelled once
+    `cancel()` was called, so the job unwinds through its own cleanup. A
+    result that arrives after cancelling is dropped. Callbacks run on the
+    worker thread: `on_progress(fraction)` (None while the total is
+    unknown), then one of `on_done(result)` or `on_error(exc)`, and
+    finally `on_finish(task)`.
+    """
+
+    def __init__(self, work, on_done=None, on_error=None, on_progress=None, on_finish=None):
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled()
+
+    def progress(self, done, total=None):
+        self.check()
+        if self.on_progress:
+            self.on_progress(done / total if total else None)
+
+    def _run(self):
+        try:
+            result = self.work(self)
+            self.check()
+        except Cancelled:
+            pass
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+        else:
+            if self.on_done:
+                self.on_done(result)
+        finally:
+            if self.on_finish:
+                self.on_finish(self)
+
+    def join(self, timeout=None):
+        self.thread.join(timeout)
@@ -0,0 +1,132 @@
+# test_midi_export.py
+"""The hand-written SMF encoder, read back through mido."""
+import io
+
+import mido
+import numpy as np
+import pytest
+
+from midi_export import DRUM_CHANNEL, PPQ, export_stream
+from midi_import import load_pattern
+from sequencer import Pattern
+
+
+def _pattern(hits, steps=16):
+    pattern = Pattern(steps)
+    for row, col in hits:
+        pattern.set_hit(row, col)
+    return pattern
+
+
+def _export(patterns, bpm=120, split_rows=False):
+    out = io.BytesIO()
+    export_stream(patterns, bpm, out, split_rows=split_rows)
+    return out.getvalue()
+
+
+def _read(data):
+    return mido.MidiFile(file=io.BytesIO(data))
+
+
+def _notes(track):
+    """(absolute tick, note, velocity) of every note event; offs have velocity 0."""
+    tick, events = 0, []
+    for msg in track:
+        tick += msg.time
+        if msg.type == "note_on":
+            events.append((tick, msg.note, msg.velocity))
+    return events
+
+
+def _track_bodies(data):
+    bodies, pos = [], 14
+    while pos < len(data):
+        assert data[pos:pos + 4] == b"MTrk"
+        size = int.from_bytes(data[pos + 4:pos + 8], "big")
+        bodies.append(data[pos + 8:pos + 8 + size])
+        pos += 8 + size
+    return bodies
+
+
+def test_header_and_tempo():
+    mid = _read(_export([_pattern([(0, 0)])], bpm=150))
+    assert mid.type == 1
+    assert mid.ticks_per_beat == PPQ
+    tempo = [msg.tempo for msg in mid.tracks[0] if msg.type == "set_tempo"]
+    assert tempo == [mido.bpm2tempo(150)]
+
+
+def test_round_trip_through_import(tmp_path):
+    pattern = Pattern(16)
+    pattern.set_hit(0, 0, velocity=90)
+    pattern.set_hit(1, 4, offset=10)
+    pattern.set_hit(2, 7)
+    path = tmp_path / "pattern.mid"
+    path.write_bytes(_export([pattern], bpm=100))
+    imported, bpm = load_pattern(str(path), kit=pattern.kit)
+    assert bpm == 100
+    assert np.array_equal(imported.grid, pattern.grid)
+    assert imported.velocity[0, 0] == 90
+    assert imported.offset[1, 4] == 10
+
+
+def test_hits_on_one_tick_share_it():
+    mid = _read(_export([_pattern([(0, 0), (1, 0), (2, 0), (2, 4)])]))
+    ons = [(tick, note) for tick, note, velocity in _notes(mid.tracks[1]) if velocity]
+    assert ons == [(0, 36), (0, 38), (0, 42), (480, 42)]
+    deltas = [msg.time for msg in mid.tracks[1] if msg.type == "note_on"][:3]
+    assert deltas == [0, 0, 0]
+
+
+def test_running_status():
+    data = _export([_pattern([(0, 0), (1, 4), (2, 8)])])
+    body = _track_bodies(data)[1]
+    # One status byte for all six note events; the rest ride on running status
+    assert body.count(0x90 | DRUM_CHANNEL) == 1
+    assert len(_notes(_read(data).tracks[1])) == 6
+
+
+def test_split_rows_one_track_per_note():
+    patterns = [_pattern([(0, 0), (2, 2)]), _pattern([(1, 1), (2, 3)])]
+    mid = _read(_export(patterns, split_rows=True))
+    assert len(mid.tracks) == 4
+    notes = [{note for _, note, _ in _notes(track)} for track in mid.tracks[1:]]
+    assert notes == [{36}, {42}, {38}]
+    # The second pattern starts one bar (16 steps) in
+    assert [tick for tick, _, v in _notes(mid.tracks[3]) if v] == [16 * 120 + 120]
+
+
+@pytest.mark.parametrize("swing", [0.0, 0.3, 0.5])
+def test_retriggered_notes_alternate_on_off(swing):
+    pattern = Pattern.from_array(np.ones((3, 16), dtype=bool), swing=swing)
+    mid = _read(_export([pattern, pattern]))
+    for note in (36, 38, 42):
+        events = [(tick, velocity > 0) for tick, n, velocity in _notes(mid.tracks[1]) if n == note]
+        assert [on for _, on in events] == [True, False] * 32
+        ticks = [tick for tick, _ in events]
+        assert ticks == sorted(ticks)
+
+
+def test_abort_leaves_target_untouched(tmp_path):
+    target = tmp_path / "out.mid"
+    target.write_bytes(b"old")
+
+    def progress(count):
+        if count == 2:
+            raise RuntimeError("stop")
+
+    with pytest.raises(RuntimeError):
+        export_stream([_pattern([(0, 0)])] * 3, 120, str(target), progress=progress)
+    assert target.read_bytes() == b"old"
+
+
+def test_abort_never_creates_target(tmp_path):
+    target = tmp_path / "out.mid"
+
+    def patterns():
+        yield _pattern([(0, 0)])
+        raise ValueError("bad pattern")
+
+    with pytest.raises(ValueError):
+        export_stream(patterns(), 120, str(target))
+    assert not target.exists()
@@ -0,0 +1,119 @@
+# test_preset_store.py
+"""PresetStore round trips and upgrades of stores from older versions."""
+import sqlite3
+
+import numpy as np
+
+from preset_store import CANONICAL_VERSION, PresetStore
+from sequencer import Pattern
+from similarity import canonical_hash, grid_hash
+
+# The table as the first version of the store created it
+OLD_SCHEMA = """
+CREATE TABLE presets (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    steps INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    bpm INTEGER,
+    tags TEXT NOT NULL DEFAULT '',
+    density REAL NOT NULL,
+    grid BLOB NOT NULL
+);
+"""
+
+
+def _patterns(n=5, steps=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return [Pattern.from_array(rng.random((3, steps)) < 0.3) for _ in range(n)]
+
+
+def _columns(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {r[1] for r in conn.execute("PRAGMA table_info(presets)")}
+    finally:
+        conn.close()
+
+
+def test_round_trip(tmp_path):
+    pattern = _patterns(1)[0]
+    pattern.set_hit(0, 3, velocity=70, offset=-5)
+    pattern.swing = 0.25
+    with PresetStore(str(tmp_path / "p.db")) as store:
+        preset_id = store.add(pattern, bpm=95, tags=("rock",), name="a")
+    with PresetStore(str(tmp_path / "p.db")) as store:
+        loaded = store.get(preset_id)
+        assert np.array_equal(loaded.grid, pattern.grid)
+        assert np.array_equal(loaded.velocity, pattern.velocity)
+        assert np.array_equal(loaded.offset, pattern.offset)
+        assert loaded.swing == 0.25
+        assert loaded.kit.name == pattern.kit.name
+        assert store.info(preset_id)["tags"] == ["rock"]
+        assert store.ids(tag="rock") == [preset_id]
+
+
+def test_migrates_store_without_hash_groove_or_kit(tmp_path):
+    path = str(tmp_path / "old.db")
+    patterns = _patterns()
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    for p in patterns:
+        conn.execute(
+            "INSERT INTO presets (name, steps, rows, bpm, density, grid) VALUES (?, ?, ?, ?, ?, ?)",
+            (None, p.steps, p.rows, 120, float(p.grid.mean()), p.pack()),
+        )
+    conn.commit()
+    conn.close()
+
+    with PresetStore(path) as store:
+        assert len(store) == len(patterns)
+        for preset_id, p in zip(store.ids(), patterns):
+            loaded = store.get(preset_id)
+            assert np.array_equal(loaded.grid, p.grid)
+            assert loaded.velocity is None and loaded.offset is None and loaded.swing == 0
+            assert loaded.kit.name == "default"
+        first = store.ids()[0]
+        assert first in store.find(patterns[0])
+        rotated = Pattern.from_array(np.roll(patterns[0].grid, 3, axis=1))
+        assert first in store.find(rotated, ignore_rotation=True)
+        assert store.nearest(patterns[0], k=1) == [(first, 0)]
+        assert store.conn.execute("PRAGMA user_version").fetchone()[0] == CANONICAL_VERSION
+    assert {"hash", "canonical", "velocity", "offset", "swing", "kit"} <= _columns(path)
+
+
+def test_rehashes_canonical_hashes_of_older_versions(tmp_path):
+    path = str(tmp_path / "p.db")
+    patterns = _patterns()
+    with PresetStore(path) as store:
+        store.add_many((p, {}) for p in patterns)
+        with store.conn:
+            store.conn.execute("UPDATE presets SET canonical = 'stale'")
+            store.conn.execute("PRAGMA user_version = 0")
+
+    with PresetStore(path) as store:
+        rows = store.conn.execute("SELECT hash, canonical FROM presets ORDER BY id").fetchall()
+        assert rows == [(grid_hash(p), canonical_hash(p)) for p in patterns]
+        assert store.conn.execute("PRAGMA user_version").fetchone()[0] == CANONICAL_VERSION
+
+
+def test_current_store_is_not_rehashed(tmp_path):
+    path = str(tmp_path / "p.db")
+    with PresetStore(path) as store:
+        store.add(_patterns(1)[0])
+        with store.conn:
+            store.conn.execute("UPDATE presets SET canonical = 'kept'")
+
+    with PresetStore(path) as store:
+        assert store.conn.execute("SELECT canonical FROM presets").fetchone()[0] == "kept"
+
+
+def test_dedupe(tmp_path):
+    pattern = _patterns(1)[0]
+    rotated = Pattern.from_array(np.roll(pattern.grid, 1, axis=1))
+    with PresetStore(str(tmp_path / "p.db")) as store:
+        first = store.add(pattern)
+        assert store.add(pattern, dedupe="exact") is None
+        assert store.add(rotated, dedupe="exact") is not None
+        assert store.add(rotated, dedupe="rotation") is None
+        assert store.find(pattern) == [first]
@@ -0,0 +1,66 @@
+# test_similarity.py
+"""Rotation-invariant hashing and Hamming search."""
+import numpy as np
+import pytest
+
+from sequencer import Pattern
+from similarity import _POPCOUNT, _least_rotation, canonical_hash, grid_hash, hamming_distances, nearest
+
+
+def _brute_least_rotation(codes):
+    rotations = [codes[i:] + codes[:i] for i in range(len(codes))]
+    return rotations.index(min(rotations))
+
+
+@pytest.mark.parametrize("alphabet", [2, 3, 8])
+def test_least_rotation_matches_brute_force(alphabet):
+    rng = np.random.default_rng(alphabet)
+    for n in range(1, 40):
+        for _ in range(20):
+            codes = rng.integers(0, alphabet, n).tolist()
+            start = _least_rotation(codes)
+            expected = _brute_least_rotation(codes)
+            # Periodic sequences may start at any copy of the same rotation
+            assert codes[start:] + codes[:start] == codes[expected:] + codes[:expected]
+
+
+@pytest.mark.parametrize("codes", [[0], [1, 1, 1], [1, 0, 1, 0], [2, 1, 2, 1, 1], [3, 2, 1, 0]])
+def test_least_rotation_edge_cases(codes):
+    start = _least_rotation(codes)
+    assert codes[start:] + codes[:start] == min(codes[i:] + codes[:i] for i in range(len(codes)))
+
+
+def test_canonical_hash_ignores_rotation():
+    rng = np.random.default_rng(1)
+    for steps in (1, 7, 16, 33):
+        pattern = Pattern.from_array(rng.random((3, steps)) < 0.4)
+        rotated = Pattern.from_array(np.roll(pattern.grid, 5, axis=1))
+        assert canonical_hash(rotated) == canonical_hash(pattern)
+
+
+def test_canonical_hash_tells_grooves_apart():
+    a = Pattern.from_array(np.array([[1, 0, 0, 0], [0, 0, 1, 0]], dtype=bool))
+    b = Pattern.from_array(np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=bool))
+    assert canonical_hash(a) != canonical_hash(b)
+    # Same bits in another shape is another pattern
+    c = Pattern.from_array(a.grid.reshape(1, 8))
+    assert grid_hash(c) != grid_hash(a)
+
+
+def test_hamming_distances_do_not_overflow():
+    # Each row differs from the query in every bit: 8 * 10000 bits
+    packed = np.full((3, 10000), 0xFF, dtype=np.uint8)
+    query = bytes(10000)
+    assert hamming_distances(query, packed).tolist() == [80000] * 3
+    assert _POPCOUNT[packed].sum(axis=1, dtype=np.int64).tolist() == [80000] * 3
+
+
+def test_nearest_orders_by_distance():
+    rng = np.random.default_rng(2)
+    packed = rng.integers(0, 256, (50, 6), dtype=np.uint8)
+    query = packed[17].tobytes()
+    idx, distances = nearest(query, packed, k=5)
+    expected = np.unpackbits(packed ^ packed[17], axis=1).sum(axis=1)
+    assert idx[0] == 17 and distances[0] == 0
+    assert distances.tolist() == sorted(expected)[:5]
+    assert nearest(query, packed[:0], k=5)[0].size == 0
@@ -0,0 +1,38 @@
+# test_startup.py
+"""Import-time budget of the entry points (see startup_bench.py).
+
+The lazy-import checks always run. The millisecond budgets depend on the
+machine and its load, so they only run with STARTUP_BUDGET=1 set.
+"""
+import importlib.util
+import os
+
+import pytest
+
+from startup_bench import BUDGETS, LAZY, bench, import_times
+
+# Headroom over a budget for timer noise on a busy machine
+MARGIN = 1.1
+
+REQUIRES = {"gui": "flet", "cli": None}
+
+
+def _skip_without_deps(module):
+    dependency = REQUIRES.get(module)
+    if dependency and importlib.util.find_spec(dependency) is None:
+        pytest.skip(f"{dependency} is not installed")
+
+
+@pytest.mark.parametrize("module", sorted(LAZY))
+def test_lazy_modules_not_imported_at_startup(module):
+    _skip_without_deps(module)
+    times = import_times(module)
+    assert [name for name in LAZY[module] if name in times] == []
+
+
+@pytest.mark.skipif(not os.environ.get("STARTUP_BUDGET"), reason="set STARTUP_BUDGET=1 to check timings")
+@pytest.mark.parametrize("module", sorted(BUDGETS))
+def test_import_time_within_budget(module):
+    _skip_without_deps(module)
+    total, _ = bench(module, runs=3)
+    assert total <= BUDGETS[module] * MARGIN, f"{module} imports in {total:.1f} ms"
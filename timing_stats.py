@@ -0,0 +1,131 @@
+# timing_stats.py
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+HISTORY = 4096
+# Histogram bin edges in milliseconds of lateness
+BINS_MS = (-1.0, 0.0, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0)
+
+
+class TimingRecorder:
+    """Ring buffer of per-step timing measurements.
+
+    Each fired step records its scheduled time, the time the callback
+    actually started, how long the callback took and how many steps were
+    dropped just before it. Recording is a handful of array stores, cheap
+    enough for the timing thread; reading takes a copy so it can be done
+    from any thread while playback runs.
+    """
+
+    def __init__(self, capacity=HISTORY):
+        self.capacity = capacity
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self.scheduled = np.zeros(capacity, dtype=np.float64)
+        self.actual = np.zeros(capacity, dtype=np.float64)
+        self.duration = np.zeros(capacity, dtype=np.float64)
+        self.skipped = np.zeros(capacity, dtype=np.int32)
+        self.count = 0  # steps recorded in total (may exceed capacity)
+        self.dropped = 0
+        self._pending_drops = 0
+
+    def record(self, step, scheduled, actual, duration):
+        i = self.count % self.capacity
+        self.steps[i] = step
+        self.scheduled[i] = scheduled
+        self.actual[i] = actual
+        self.duration[i] = duration
+        self.skipped[i] = self._pending_drops
+        self._pending_drops = 0
+        self.count += 1
+
+    def record_drop(self, count):
+        self.dropped += count
+        self._pending_drops += count
+
+    def clear(self):
+        self.count = 0
+        self.dropped = 0
+        self._pending_drops = 0
+
+    def snapshot(self):
+        """Return (steps, lateness, duration, skipped) arrays in step order."""
+        n = min(self.count, self.capacity)
+        order = np.arange(self.count - n, self.count) % self.capacity
+        return (
+            self.steps[order],
+            self.actual[order] - self.scheduled[order],
+            self.duration[order],
+            self.skipped[order],
+        )
+
+    def jitter(self):
+        """Return lateness and callback duration percentiles in seconds."""
+        _, late, duration, _ = self.snapshot()
+        if not len(late):
+            return {"steps": 0, "dropped": self.dropped, "p50": 0.0, "p99": 0.0,
+                    "max": 0.0, "mean": 0.0, "callback_p50": 0.0, "callback_p99": 0.0}
+        p50, p99 = np.percentile(late, (50, 99))
+        c50, c99 = np.percentile(duration, (50, 99))
+        return {
+            "steps": len(late),
+            "dropped": self.dropped,
+            "p50": float(p50),
+            "p99": float(p99),
+            "max": float(late.max()),
+            "mean": float(late.mean()),
+            "callback_p50": float(c50),
+            "callback_p99": float(c99),
+        }
+
+    def histogram(self, bins_ms=BINS_MS):
+        """Return (counts, edges_ms) of step lateness; the outer bins are open-ended."""
+        _, late, _, _ = self.snapshot()
+        edges = np.asarray(bins_ms, dtype=np.float64)
+        counts = np.bincount(np.searchsorted(edges, late * 1000.0, side="right"),
+                             minlength=len(edges) + 1)
+        return counts, edges
+
+    def report(self, out=sys.stdout):
+        """Write a readable summary and histogram to `out`."""
+        stats = self.jitter()
+        out.write(
+            f"steps {stats['steps']}  dropped {stats['dropped']}\n"
+            f"lateness  p50 {stats['p50'] * 1000:.3f} ms  p99 {stats['p99'] * 1000:.3f} ms"
+            f"  max {stats['max'] * 1000:.3f} ms\n"
+            f"callback  p50 {stats['callback_p50'] * 1000:.3f} ms"
+            f"  p99 {stats['callback_p99'] * 1000:.3f} ms\n"
+        )
+        counts, edges = self.histogram()
+        labels = [f"< {edges[0]:g}"]
+        labels += [f"{lo:g} .. {hi:g}" for lo, hi in zip(edges[:-1], edges[1:])]
+        labels.append(f">= {edges[-1]:g}")
+        width = max(1, counts.max()) if len(counts) else 1
+        for label, n in zip(labels, counts.tolist()):
+            out.write(f"{label:>12} ms {n:7d} {'#' * int(40 * n / width)}\n")
+
+
+def main(argv=None):
+    """Run the step scheduler with an empty callback and print its timing."""
+    from scheduler import StepScheduler
+
+    parser = argparse.ArgumentParser(description="Measure step scheduler timing on this machine.")
+    parser.add_argument("--bpm", type=float, default=120.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    scheduler = StepScheduler(60.0 / args.bpm / 4.0)
+    end = time.perf_counter() + args.seconds
+    thread = threading.Thread(
+        target=scheduler.run, args=(lambda n, deadline: None, lambda: time.perf_counter() < end)
+    )
+    thread.start()
+    thread.join()
+    scheduler.recorder.report()
+
+
+if __name__ == "__main__":
+    main()
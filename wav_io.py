@@ -0,0 +1,101 @@
+# wav_io.py
+import struct
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _read_wav(f):
+    """Parse a RIFF/WAVE stream, returning (format, channels, rate, width, data)."""
+    riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+    if riff != b"RIFF" or wave_id != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        chunk_id, size = struct.unpack("<4sI", header)
+        body = f.read(size + (size & 1))[:size]
+        if chunk_id == b"fmt ":
+            tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                # The real format tag is the first two bytes of the SubFormat GUID
+                tag = struct.unpack("<H", body[24:26])[0]
+            fmt = (tag, channels, rate, bits // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("data chunk before fmt chunk")
+            return fmt + (body,)
+    raise ValueError("no data chunk")
+
+
+def _pcm_to_float(tag, width, data):
+    if tag == WAVE_FORMAT_IEEE_FLOAT:
+        return np.frombuffer(data, dtype="<f4" if width == 4 else "<f8").astype(np.float32)
+    if tag != WAVE_FORMAT_PCM:
+        raise ValueError(f"unsupported WAV format tag: {tag:#x}")
+    if width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if width == 2:
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if width == 3:
+        raw = np.frombuffer(data[:len(data) - len(data) % 3], dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8)
+                | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        return ints.astype(np.float32) / 8388608.0
+    if width == 4:
+        return np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648.0
+    raise ValueError(f"unsupported sample width: {width}")
+
+
+def decode_wav(path, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """Decode a WAV file into a float32 (frames, channels) array in [-1, 1]."""
+    with open(path, "rb") as f:
+        tag, src_channels, src_rate, width, data = _read_wav(f)
+
+    samples = _pcm_to_float(tag, width, data)
+    samples = samples[:len(samples) - len(samples) % src_channels].reshape(-1, src_channels)
+
+    # Match the engine channel layout
+    if src_channels != channels:
+        if channels == 1:
+            samples = samples.mean(axis=1, keepdims=True)
+        elif src_channels == 1:
+            samples = np.repeat(samples, channels, axis=1)
+        else:
+            samples = samples[:, :channels]
+
+    # Linear resampling is plenty for one-shot drum hits
+    if src_rate != sample_rate and len(samples):
+        n = int(round(len(samples) * sample_rate / src_rate))
+        src_pos = np.arange(n) * (src_rate / sample_rate)
+        idx = np.arange(len(samples))
+        samples = np.stack(
+            [np.interp(src_pos, idx, samples[:, ch]) for ch in range(samples.shape[1])],
+            axis=1,
+        )
+
+    return np.ascontiguousarray(samples, dtype=np.float32)
+
+
+def write_wav(target, buffer, sample_rate=SAMPLE_RATE):
+    """Write a float (frames, channels) buffer as 16-bit PCM to a path or file object."""
+    buffer = np.asarray(buffer, dtype=np.float32)
+    if buffer.ndim == 1:
+        buffer = buffer[:, None]
+    pcm = (np.clip(buffer, -1.0, 1.0) * 32767.0).astype("<i2")
+    with wave.open(target, "wb") as w:
+        w.setnchannels(buffer.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())